@@ -0,0 +1,67 @@
+"""Per-call overhead of rewriting :name bind parameters for repeated queries."""
+
+import re
+
+from common import report, timed
+
+from databaseci.psyco import compile_query, reformat_bind_params
+
+QUERIES = dict(
+    short="select * from t where id = :id",
+    medium="""
+        select o.id, o.total::numeric, c.name
+        from orders o join customers c on c.id = o.customer_id
+        where o.created_at > :since and c.region = :region and o.note not like '%:x%'
+        order by o.created_at desc
+        limit :limit
+    """,
+)
+
+
+def legacy_reformat_bind_params(q):
+    # the implementation this replaced: recompiled and rescanned on every call
+    x = re.compile(r"[^:](:[a-z0-9_]+)")
+
+    parts = []
+    remainder = 0
+
+    for m in x.finditer(q):
+        a, b = m.start(1), m.end(1)
+        parts.append(q[remainder:a])
+        parts.append(f"%({q[a + 1 : b]})s")
+        remainder = b
+
+    parts.append(q[remainder:])
+    return "".join(parts)
+
+
+def run(number=20000):
+    results = []
+
+    for label, q in QUERIES.items():
+        results.append(
+            timed(
+                f"bind_params.legacy.{label}",
+                lambda: legacy_reformat_bind_params(q),
+                number=number,
+            )
+        )
+        results.append(
+            timed(
+                f"bind_params.cached.{label}",
+                lambda: reformat_bind_params(q),
+                number=number,
+            )
+        )
+
+        def uncached():
+            compile_query.cache_clear()
+            compile_query(q)
+
+        results.append(timed(f"bind_params.uncached.{label}", uncached, number=number))
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
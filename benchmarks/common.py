@@ -0,0 +1,56 @@
+import json
+import platform
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+from statistics import median
+
+
+def timed(name, fn, *, number=1000, repeat=5, **extra):
+    """Time `fn`, returning a result dict with per-call timings in microseconds."""
+
+    timings = timeit.repeat(fn, number=number, repeat=repeat)
+    per_call = [t / number * 1e6 for t in timings]
+
+    return dict(
+        name=name,
+        number=number,
+        repeat=repeat,
+        best_us=min(per_call),
+        median_us=median(per_call),
+        **extra,
+    )
+
+
+def report(results, stream=None):
+    stream = stream or sys.stdout
+
+    for r in results:
+        stream.write(json.dumps(r) + "\n")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Details of what was benchmarked, for telling results apart."""
+
+    import psycopg2
+
+    return dict(
+        git_revision=git_revision(),
+        python=platform.python_version(),
+        psycopg2=psycopg2.__version__.split()[0],
+        machine=platform.machine(),
+    )
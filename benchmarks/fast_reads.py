@@ -0,0 +1,30 @@
+"""Requests per second for small single-statement reads through `db.q`, with
+and without the read-only autocommit fast path."""
+
+from common import report, timed
+
+QUERY = "select :id as id, 'a' as name, now() as created"
+
+
+def run(number=5000):
+    from databaseci import temporary_local_db
+
+    results = []
+
+    with temporary_local_db() as db:
+        for fast_read in (False, True):
+            result = timed(
+                f"fast_reads.q.{'fast' if fast_read else 'transaction'}",
+                lambda: db.q(QUERY, id=1, fast_read=fast_read),
+                number=number,
+            )
+            result["requests_per_second"] = 1e6 / result["best_us"]
+            results.append(result)
+
+        db.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,83 @@
+"""Import time of the package and of the command line tool, from
+`python -X importtime`, checking that `import databaseci` doesn't load any
+of the heavy dependencies that are only needed by some features.
+
+Exits with status 1 if any of them are imported eagerly.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from common import report
+
+ROOT = Path(__file__).parent.parent
+
+TARGETS = dict(
+    package="import databaseci",
+    database="import databaseci; databaseci.db",
+    cli="import databaseci.command",
+)
+
+# only loaded on first use of the feature that needs them
+LAZY_DEPENDENCIES = ("sqlalchemy", "pendulum", "six", "yaml", "click", "asyncio")
+
+
+def raw_import_times(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            yield name.strip(), int(cumulative), not name.startswith("  ")
+
+
+def import_times(code):
+    """(module, cumulative microseconds, top level) for every module imported
+    by `code` in a fresh interpreter, ignoring imports made at startup."""
+
+    startup = {name for name, _, _ in raw_import_times("pass")}
+    return [_ for _ in raw_import_times(code) if _[0] not in startup]
+
+
+def eager_dependencies(times):
+    imported = {name.split(".")[0] for name, _, _ in times}
+    return sorted(imported & set(LAZY_DEPENDENCIES))
+
+
+def run(repeat=5):
+    results = []
+
+    for label, code in TARGETS.items():
+        runs = [import_times(code) for _ in range(repeat)]
+        totals = [sum(us for _, us, top in times if top) for times in runs]
+
+        results.append(
+            dict(
+                name=f"import_time.{label}",
+                repeat=repeat,
+                best_us=min(totals),
+                modules=len(runs[0]),
+                eager_dependencies=eager_dependencies(runs[0]),
+            )
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    report(results)
+
+    package = results[0]
+
+    if package["eager_dependencies"]:
+        sys.exit(
+            "import databaseci loaded: " + ", ".join(package["eager_dependencies"])
+        )
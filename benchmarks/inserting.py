@@ -0,0 +1,49 @@
+"""Throughput of `Inserting.insert` with multi-row `insert ... values`
+statements and with `COPY`, over increasing numbers of rows."""
+
+from common import report, timed
+
+SIZES = (1000, 100000, 1000000)
+
+CREATE = "create table bench_insert (id bigint, name text, amount numeric, note text)"
+
+
+def generated_rows(count):
+    return (
+        dict(id=i, name=f"name {i}", amount=i * 1.5, note=None) for i in range(count)
+    )
+
+
+def run(sizes=SIZES, methods=("values", "copy")):
+    from databaseci import temporary_local_db
+
+    results = []
+
+    with temporary_local_db() as db:
+        db.q(CREATE)
+
+        for size in sizes:
+            for method in methods:
+
+                def insert():
+                    with db.t() as t:
+                        t.insert("bench_insert", generated_rows(size), method=method)
+                        t.q("truncate bench_insert")
+
+                result = timed(
+                    f"inserting.{method}.{size}",
+                    insert,
+                    number=1,
+                    repeat=3 if size < 1000000 else 1,
+                    rows=size,
+                )
+                result["rows_per_second"] = size / result["best_us"] * 1e6
+                results.append(result)
+
+        db.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
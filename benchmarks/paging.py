@@ -0,0 +1,115 @@
+"""Time to walk through every page of a table, following `Paging.next`
+bookmarks, at a few page sizes, and to fetch a page from the middle of a
+large table with each paging mode."""
+
+from common import report, timed
+
+ROW_COUNT = 100000
+
+PAGE_SIZES = (10, 100, 1000)
+
+QUERY = "select * from bench_paging"
+
+LARGE_ROW_COUNT = 1000000
+
+# name, query, order_by, and a bookmark from the middle of the results
+MODE_QUERIES = (
+    ("filtered", "select * from bench_paging_large where b = 5", "id", (500000,)),
+    ("distinct", "select distinct a, b from bench_paging_large", "a, b", (500, 0)),
+    ("columns", "select id, a from bench_paging_large", "id", (500000,)),
+)
+
+PAGING_MODES = ("wrap", "inline")
+
+
+def walk(t, per_page, pages=None):
+    bookmark = None
+    walked = 0
+
+    while pages is None or walked < pages:
+        rows = t.q(
+            QUERY, paging=dict(order_by="id", per_page=per_page, bookmark=bookmark)
+        )
+        walked += 1
+
+        if rows.paging.at_end:
+            break
+        bookmark = rows.paging.next
+
+    return walked
+
+
+def seek(t, query, order_by, bookmark, mode):
+    paging = dict(order_by=order_by, per_page=100, bookmark=bookmark, mode=mode)
+    return t.q(query, paging=paging)
+
+
+def run_modes(db, row_count):
+    results = []
+
+    with db.t() as t:
+        t.q(
+            """
+            create table bench_paging_large (id int primary key, a int, b int);
+            insert into bench_paging_large
+                select i, i %% 1000, i %% 37 from generate_series(1, :n) i;
+            create index on bench_paging_large (a, b);
+            analyze bench_paging_large;
+            """,
+            n=row_count,
+        )
+
+    with db.t() as t:
+        for name, query, order_by, bookmark in MODE_QUERIES:
+            for mode in PAGING_MODES:
+                results.append(
+                    timed(
+                        f"paging.mode.{name}.{mode}",
+                        lambda: seek(t, query, order_by, bookmark, mode),
+                        number=100,
+                        rows=row_count,
+                    )
+                )
+
+    return results
+
+
+def run(
+    row_count=ROW_COUNT,
+    page_sizes=PAGE_SIZES,
+    pages=100,
+    large_row_count=LARGE_ROW_COUNT,
+):
+    from databaseci import temporary_local_db
+
+    results = []
+
+    with temporary_local_db() as db:
+        with db.t() as t:
+            t.q("create table bench_paging (id int primary key, name text)")
+            t.insert(
+                "bench_paging",
+                (dict(id=i, name=f"name {i}") for i in range(row_count)),
+            )
+            t.q("analyze bench_paging")
+
+        with db.t() as t:
+            for per_page in page_sizes:
+                results.append(
+                    timed(
+                        f"paging.walk.{per_page}",
+                        lambda: walk(t, per_page, pages),
+                        number=1,
+                        pages=pages,
+                        per_page=per_page,
+                    )
+                )
+
+        results.extend(run_modes(db, large_row_count))
+        db.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
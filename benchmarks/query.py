@@ -0,0 +1,35 @@
+"""Latency of small queries through `Transaction.q`, within a transaction and
+as one-off `db.q` calls."""
+
+from common import report, timed
+
+SMALL = "select :id as id, 'name' as name, now() as created"
+
+ROWS_100 = "select i as id, 'name ' || i as name from generate_series(1, 100) i"
+
+
+def run(number=5000):
+    from databaseci import temporary_local_db
+
+    results = []
+
+    with temporary_local_db() as db:
+        with db.t() as t:
+            results.append(
+                timed("query.t.small", lambda: t.q(SMALL, id=1), number=number)
+            )
+            results.append(
+                timed("query.t.rows_100", lambda: t.q(ROWS_100), number=number // 5)
+            )
+
+        results.append(
+            timed("query.db.small", lambda: db.q(SMALL, id=1), number=number // 5)
+        )
+
+        db.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
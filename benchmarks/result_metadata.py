@@ -0,0 +1,73 @@
+"""Per-query cost of building result metadata (column index and column_info)
+for small result sets, with and without the shared result shape cache."""
+
+from collections import OrderedDict
+
+from common import report, timed
+from psycopg2.extensions import Column
+
+from databaseci.constants import type_codes
+from databaseci.curs import result_shape
+
+DESCRIPTION = tuple(
+    Column(name=name, type_code=type_code)
+    for name, type_code in [
+        ("id", 23),
+        ("name", 25),
+        ("created", 1184),
+        ("amount", 1700),
+        ("active", 16),
+        ("note", 25),
+    ]
+)
+
+
+def legacy_metadata(description):
+    # per-execute work done before result shapes were cached
+    index = OrderedDict()
+
+    for i in range(len(description)):
+        index[description[i][0]] = i
+
+    column_info = {c.name: type_codes.get(c.type_code, "unknown") for c in description}
+    return index, column_info
+
+
+def cached_metadata(description):
+    shape = result_shape(description)
+    return shape.index, shape.column_info
+
+
+def run(number=100000):
+    results = [
+        timed(
+            "result_metadata.legacy",
+            lambda: legacy_metadata(DESCRIPTION),
+            number=number,
+        ),
+        timed(
+            "result_metadata.cached",
+            lambda: cached_metadata(DESCRIPTION),
+            number=number,
+        ),
+    ]
+
+    from databaseci import temporary_local_db
+
+    with temporary_local_db() as db:
+        with db.t() as t:
+            query = "select 1 as id, 'a' as name, now() as created, 1.5 as amount"
+
+            results.append(
+                timed(
+                    "result_metadata.small_query",
+                    lambda: t.q(query),
+                    number=number // 50,
+                )
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,96 @@
+"""Construction and access cost of DictRow, against the list-based DictRow it
+replaced, over a large number of rows."""
+
+from common import report, timed
+
+from databaseci.curs import DictRow, row_class
+
+NAMES = ["id", "name", "amount", "active", "note"]
+INDEX = {k: i for i, k in enumerate(NAMES)}
+
+_list_getitem = list.__getitem__
+
+
+class LegacyDictRow(list):
+    # the previous implementation, filled in place by a psycopg2 row_factory
+
+    __slots__ = ("_index",)
+
+    def __init__(self, index, size):
+        self._index = index
+        self[:] = [None] * size
+
+    def __getitem__(self, x):
+        if not isinstance(x, (int, slice)):
+            x = self._index[x]
+        return super().__getitem__(x)
+
+    def __getattribute__(self, name):
+        try:
+            i = object.__getattribute__(self, "_index")[name]
+            return _list_getitem(self, i)
+        except LookupError:
+            pass
+
+        return object.__getattribute__(self, name)
+
+
+def legacy_row(values):
+    row = LegacyDictRow(INDEX, len(values))
+
+    for i, v in enumerate(values):
+        list.__setitem__(row, i, v)
+    return row
+
+
+def run(row_count=1000000):
+    tuples = [(i, f"name {i}", i * 1.5, bool(i % 2), None) for i in range(row_count)]
+
+    cls = row_class(tuple(INDEX.items()))
+    new = tuple.__new__
+
+    legacy_rows = [legacy_row(_) for _ in tuples[:1000]]
+    rows = [new(cls, _) for _ in tuples[:1000]]
+
+    results = [
+        timed(
+            "rows.construct.legacy",
+            lambda: [legacy_row(_) for _ in tuples],
+            number=1,
+            repeat=3,
+            rows=row_count,
+        ),
+        timed(
+            "rows.construct.generated",
+            lambda: [new(cls, _) for _ in tuples],
+            number=1,
+            repeat=3,
+            rows=row_count,
+        ),
+    ]
+
+    accesses = dict(
+        attribute=lambda r: r.amount,
+        key=lambda r: r["amount"],
+        position=lambda r: r[2],
+        as_dict=lambda r: (
+            DictRow.as_dict(r) if isinstance(r, DictRow) else dict(zip(r._index, r))
+        ),
+    )
+
+    for label, access in accesses.items():
+        for kind, sample in (("legacy", legacy_rows), ("generated", rows)):
+            results.append(
+                timed(
+                    f"rows.access.{label}.{kind}",
+                    lambda: [access(_) for _ in sample],
+                    number=1000,
+                    rows=len(sample),
+                )
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
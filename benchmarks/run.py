@@ -0,0 +1,61 @@
+"""Runs the benchmarks, writing one JSON line per result (each tagged with its
+benchmark module and details of the environment) so that results from
+different versions can be compared.
+
+    python benchmarks/run.py [--only rows,query] [--output results.jsonl]
+
+Benchmarks that need a database use `temporary_local_db`, so a local
+PostgreSQL server that the current user can create databases on is needed.
+"""
+
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+from common import environment, report
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+BENCHMARKS = (
+    "import_time",
+    "query",
+    "fast_reads",
+    "bind_params",
+    "result_metadata",
+    "rows",
+    "inserting",
+    "paging",
+    "text",
+)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help="comma separated benchmark modules to run")
+    parser.add_argument("--output", help="append results to this file")
+    options = parser.parse_args(args)
+
+    names = options.only.split(",") if options.only else BENCHMARKS
+
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    env = environment()
+    stream = open(options.output, "a") if options.output else sys.stdout
+
+    try:
+        for name in names:
+            module = importlib.import_module(name)
+            results = module.run()
+
+            report([dict(r, module=name, **env) for r in results], stream)
+            stream.flush()
+    finally:
+        if options.output:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Costs of the text helpers: parsing CSV with `rows_from_text`, rendering
+with `format_table_of_dicts`, and guessing column types."""
+
+from common import report, timed
+
+from databaseci import guess_type_of_values, rows_from_text
+from databaseci.formatting import format_table_of_dicts
+
+ROW_COUNT = 10000
+
+
+def run(row_count=ROW_COUNT):
+    lines = ["id,name,amount,created"]
+    lines += [
+        f"{i},name {i},{i * 1.5},2022-01-{i % 28 + 1:02d}" for i in range(row_count)
+    ]
+    text = "\n".join(lines)
+
+    rows = rows_from_text(text)
+    dicts = rows.as_dicts()
+
+    columns = dict(
+        ints=[str(i) for i in range(row_count)],
+        floats=[str(i * 1.5) for i in range(row_count)],
+        dates=[f"2022-01-{i % 28 + 1:02d}" for i in range(row_count)],
+        text=[f"name {i}" for i in range(row_count)],
+    )
+
+    results = [
+        timed(
+            "text.rows_from_text",
+            lambda: rows_from_text(text),
+            number=10,
+            rows=row_count,
+        ),
+        timed(
+            "text.format_table_of_dicts",
+            lambda: format_table_of_dicts(dicts),
+            number=10,
+            rows=row_count,
+        ),
+    ]
+
+    for kind, values in columns.items():
+        results.append(
+            timed(
+                f"text.guess_type_of_values.{kind}",
+                lambda: guess_type_of_values(values),
+                number=1,
+                repeat=3,
+                rows=row_count,
+            )
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -1,21 +1,48 @@
-from ast import Import
+from importlib import import_module
 
 try:
     import databaseciservices as services
 except ImportError:
     services = None
-from . import command  # noqa
-from .curs import DictRow
-from .database import db  # noqa
-from .loading import rows_from_text
-from .psyco import quoted_identifier
-from .statements import create_table_statement
-from .tempdb import (
-    cleanup_temporary_docker_db_containers,
-    pull_temporary_docker_db_image,
-    temporary_docker_db,
-    temporary_local_db,
-)
-from .typeguess import guess_type_of_values
-from .urls import URL, url
-from .utils import yaml_from_file
+
+# public names, and the modules they're imported from on first use, so that
+# `import databaseci` doesn't pay for dependencies a script may never need
+LAZY_ATTRIBUTES = {
+    "AsyncDatabase": "asyncdb",
+    "async_db": "asyncdb",
+    "DictRow": "curs",
+    "db": "database",
+    "rows_from_text": "loading",
+    "quoted_identifier": "psyco",
+    "create_table_statement": "statements",
+    "cleanup_temporary_docker_db_containers": "tempdb",
+    "pull_temporary_docker_db_image": "tempdb",
+    "temporary_docker_db": "tempdb",
+    "temporary_local_db": "tempdb",
+    "guess_type_of_values": "typeguess",
+    "URL": "urls",
+    "url": "urls",
+    "yaml_from_file": "utils",
+}
+
+LAZY_MODULES = {"command"}
+
+__all__ = sorted(LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in LAZY_MODULES:
+        return import_module(f".{name}", __name__)
+
+    try:
+        module_name = LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_ATTRIBUTES) | LAZY_MODULES)
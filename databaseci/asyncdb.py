@@ -0,0 +1,507 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import psycopg2
+from psycopg2.extensions import POLL_OK, POLL_READ, POLL_WRITE, TRANSACTION_STATUS_IDLE
+
+from .curs import DictCursor
+from .inserting import batches, insert_statement, rows_with_head, values_template
+from .paging import (
+    get_count_query,
+    get_count_result,
+    get_paged_query,
+    get_paged_rows,
+    split_count_options,
+)
+from .pool import PoolBase
+from .psyco import compile_query, quoted_identifier
+from .rows import Rows, column_info_from_description
+
+
+async def ready(conn, state):
+    """Wait until the connection's socket is ready for the `state` that
+    `conn.poll()` returned."""
+
+    loop = asyncio.get_running_loop()
+    fd = conn.fileno()
+    done = loop.create_future()
+
+    def wake():
+        if not done.done():
+            done.set_result(None)
+
+    if state == POLL_READ:
+        loop.add_reader(fd, wake)
+        remove = loop.remove_reader
+    elif state == POLL_WRITE:
+        loop.add_writer(fd, wake)
+        remove = loop.remove_writer
+    else:
+        raise psycopg2.OperationalError(f"bad poll state: {state}")
+
+    try:
+        await done
+    finally:
+        remove(fd)
+
+
+async def wait(conn):
+    """Wait for the pending operation on an async connection to complete,
+    without blocking the event loop.
+
+    If the waiting task is cancelled, the server is asked to cancel the
+    running statement, so that the connection is left usable.
+    """
+
+    while True:
+        state = conn.poll()
+
+        if state == POLL_OK:
+            return
+
+        try:
+            await ready(conn, state)
+        except asyncio.CancelledError:
+            await cancel_and_drain(conn)
+            raise
+
+
+async def cancel_and_drain(conn):
+    if conn.closed:
+        return
+
+    try:
+        conn.cancel()
+
+        while (state := conn.poll()) != POLL_OK:
+            await ready(conn, state)
+    except psycopg2.extensions.QueryCanceledError:
+        pass
+    except psycopg2.Error:
+        conn.close()
+    except asyncio.CancelledError:
+        # cancelled again while draining, so the connection's state is unknown
+        conn.close()
+        raise
+
+
+async def async_connect(url):
+    conn = psycopg2.connect(url, async_=True)
+
+    try:
+        await wait(conn)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+class AsyncConnectionPool(PoolBase):
+    """The asyncio counterpart of `ConnectionPool`.
+
+    Connections are opened lazily, handed out most-recently-used first,
+    pinged before being handed out once idle for `check_after` seconds, and
+    closed once idle for longer than `max_idle` seconds (keeping at least
+    `minconn`) or older than `max_lifetime` seconds.
+    """
+
+    def __init__(
+        self,
+        url,
+        *,
+        minconn=1,
+        maxconn=10,
+        timeout=30.0,
+        max_idle=300.0,
+        max_lifetime=3600.0,
+        check_after=1.0,
+    ):
+        super().__init__(
+            url,
+            minconn=minconn,
+            maxconn=maxconn,
+            timeout=timeout,
+            max_idle=max_idle,
+            max_lifetime=max_lifetime,
+            check_after=check_after,
+        )
+        self._cond = None
+
+    @property
+    def cond(self):
+        # created on first use, so that it belongs to the running event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _notify(self):
+        self.cond.notify()
+
+    async def _healthy(self, conn, idle_time):
+        if not self._needs_check(idle_time):
+            return True
+
+        try:
+            with conn.cursor() as c:
+                c.execute("select 1")
+                await wait(conn)
+            return True
+        except psycopg2.Error:
+            return False
+
+    async def getconn(self, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+
+        start = time.monotonic()
+        waited = False
+
+        while True:
+            async with self.cond:
+                while True:
+                    now = time.monotonic()
+                    idle = self._checkout_idle(now)
+
+                    if idle is not None:
+                        conn, idle_since = idle
+                        break
+
+                    if self._reserve():
+                        conn = None
+                        break
+
+                    remaining = self._remaining(timeout, start, now)
+
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        await asyncio.wait_for(self.cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    finally:
+                        self._waiting -= 1
+
+            if conn is None:
+                try:
+                    conn = await async_connect(self.url)
+                except BaseException:
+                    async with self.cond:
+                        self._unreserve()
+                    raise
+
+                self._opened_connection(conn)
+
+            else:
+                try:
+                    healthy = await self._healthy(conn, time.monotonic() - idle_since)
+                except BaseException:
+                    # cancelled mid-check, so the connection's state is
+                    # unknown and it's already off the idle queue
+                    async with self.cond:
+                        self._discard(conn)
+                    raise
+
+                if not healthy:
+                    async with self.cond:
+                        self._failed_checks += 1
+                        self._discard(conn)
+                    continue
+
+            self._record_checkout(start, waited)
+            return conn
+
+    async def putconn(self, conn, close=False):
+        if not close and not conn.closed:
+            if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                close = True
+
+        async with self.cond:
+            self._release(conn, close)
+
+    async def closeall(self):
+        async with self.cond:
+            self._close_all()
+            self.cond.notify_all()
+
+    def stats(self):
+        return self._stats()
+
+
+class AsyncTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+        self.c = conn.cursor(cursor_factory=DictCursor)
+
+    async def ex(self, query, vars=None):
+        self.c.execute(query, vars)
+        await wait(self.conn)
+
+    async def execute(self, query, vars=None) -> Rows:
+        await self.ex(query, vars)
+
+        if self.c.description is None:
+            return None
+
+        rows = Rows(self.c.fetchall())
+        rows.paging = None
+        rows.column_info = column_info_from_description(self.c.description)
+
+        return rows
+
+    async def q(
+        self,
+        query,
+        params=None,
+        *,
+        paging=None,
+        fail_on_empty=False,
+        **kwargs,
+    ):
+        if not query.strip():
+            if fail_on_empty:
+                raise ValueError("Error: Empty query.")
+            else:
+                return None
+
+        compiled = compile_query(query)
+        query = compiled.text
+
+        _params = {}
+
+        if params:
+            _params.update(params)
+
+        if kwargs:
+            _params.update(kwargs)
+
+        compiled.check_params(_params)
+
+        if paging:
+            paging, count, _ = split_count_options(paging)
+
+            if paging.pop("check", None):
+                raise ValueError("paging checks aren't available for async queries")
+
+            unpaged, unpaged_params = query, dict(_params)
+            query, _params = get_paged_query(query, _params, **paging)
+
+        rows = await self.execute(query, _params)
+
+        if paging:
+            rows = get_paged_rows(rows, paging)
+
+            if count:
+                total = None
+
+                # unlike with Database, counts aren't cached here
+                if not rows.paging.is_all:
+                    counted = await self.execute(
+                        get_count_query(unpaged, count), unpaged_params
+                    )
+                    total = get_count_result(counted, count)
+                rows.paging.set_total(total, count)
+
+        return rows
+
+    async def insert(
+        self,
+        table,
+        rows,
+        upsert_on=None,
+        returning=None,
+        *,
+        page_size=100,
+        batch_rows=10000,
+        progress=None,
+    ):
+        if isinstance(upsert_on, str):
+            upsert_on = [upsert_on]
+
+        rows, head, rows_count = rows_with_head(rows)
+
+        if returning is None:
+            returning = rows_count == 1
+
+        keys = list(head[0].keys())
+
+        if not keys:
+            raise ValueError("can't insert rows without any columns")
+
+        q = insert_statement(table, keys, upsert_on, returning)
+        template = values_template(keys).encode()
+
+        # the same statement shape as execute_values, which can't be used
+        # with an async connection
+        before, after = q.encode().split(b"%s")
+
+        inserted = None
+        sent = 0
+
+        for batch in batches(rows, batch_rows):
+            for page in batches(batch, page_size):
+                values = b",".join(self.c.mogrify(template, row) for row in page)
+                fetched = await self.execute(before + values + after)
+
+                if not returning:
+                    continue
+
+                if inserted is None:
+                    inserted = fetched
+                else:
+                    inserted.extend(fetched)
+
+            sent += len(batch)
+
+            if progress:
+                progress(sent)
+
+        return inserted
+
+    async def notify(self, channel, payload):
+        await self.q(
+            """select pg_notify(:channel, :payload)""",
+            dict(channel=channel, payload=payload),
+        )
+
+
+class AsyncListener:
+    """Asynchronously iterates over notifications received on a connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        conn = self.conn
+        loop = asyncio.get_running_loop()
+
+        while not conn.notifies:
+            ready = loop.create_future()
+
+            def wake():
+                if not ready.done():
+                    ready.set_result(None)
+
+            loop.add_reader(conn.fileno(), wake)
+            try:
+                await ready
+            finally:
+                loop.remove_reader(conn.fileno())
+
+            conn.poll()
+
+        return conn.notifies.pop(0)
+
+
+def async_db(url=None, **kwargs):
+    return AsyncDatabase(url, **kwargs)
+
+
+class AsyncDatabase:
+    """An asyncio interface to a database, mirroring `Database`.
+
+    Queries run on psycopg2 connections in asynchronous mode, with waiting
+    handled by the running event loop, and return the same `Rows`/`DictRow`
+    results as the blocking API.
+    """
+
+    def __init__(
+        self,
+        url=None,
+        *,
+        pool_min=1,
+        pool_max=10,
+        pool_timeout=30.0,
+        pool_max_idle=300.0,
+        pool_max_lifetime=3600.0,
+        pool_check_after=1.0,
+    ):
+        from .database import normalized_url
+
+        _url = normalized_url(url)
+
+        self.URL = _url
+        self.url = str(_url)
+
+        self.pool = AsyncConnectionPool(
+            self.url,
+            minconn=pool_min,
+            maxconn=pool_max,
+            timeout=pool_timeout,
+            max_idle=pool_max_idle,
+            max_lifetime=pool_max_lifetime,
+            check_after=pool_check_after,
+        )
+
+    @property
+    def name(self):
+        return self.URL.relative_path
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    async def close(self):
+        await self.pool.closeall()
+
+    @asynccontextmanager
+    async def t(self):
+        conn = await self.pool.getconn()
+
+        try:
+            t = AsyncTransaction(conn)
+
+            await t.ex("begin")
+            try:
+                yield t
+            except BaseException:
+                try:
+                    await t.ex("rollback")
+                except psycopg2.Error:
+                    pass
+                raise
+            else:
+                await t.ex("commit")
+        finally:
+            await self.pool.putconn(conn)
+
+    @asynccontextmanager
+    async def t_autocommit(self):
+        conn = await self.pool.getconn()
+
+        try:
+            yield AsyncTransaction(conn)
+        finally:
+            await self.pool.putconn(conn)
+
+    async def q(self, *args, **kwargs):
+        async with self.t() as t:
+            return await t.q(*args, **kwargs)
+
+    async def insert(self, *args, **kwargs):
+        async with self.t() as t:
+            return await t.insert(*args, **kwargs)
+
+    async def notify(self, channel, payload):
+        async with self.t() as t:
+            await t.notify(channel, payload)
+
+    @asynccontextmanager
+    async def listen(self, channels):
+        if isinstance(channels, str):
+            channels = [channels]
+
+        conn = await async_connect(self.url)
+
+        try:
+            c = conn.cursor()
+
+            for name in channels:
+                c.execute(f"listen {quoted_identifier(name)};")
+                await wait(conn)
+
+            yield AsyncListener(conn)
+        finally:
+            conn.close()
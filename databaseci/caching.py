@@ -0,0 +1,313 @@
+import os
+import time
+from collections import OrderedDict
+from copy import copy as shallow_copy
+from threading import Condition, Event, Lock, Thread
+
+from .notify import start_listening
+from .rows import Rows
+
+
+def copied_rows(rows):
+    # rows themselves are immutable, so a shallow copy is enough to keep
+    # callers from modifying the cached list
+    copy = Rows(rows)
+    copy.paging = rows.paging
+    copy.column_info = rows.column_info and dict(rows.column_info)
+
+    if rows.paging is not None:
+        copy.paging = shallow_copy(rows.paging)
+        copy.paging.results = copy
+    return copy
+
+
+def query_cache_key(compiled, params, *extra):
+    """A cache key for the compiled query with the values of the parameters
+    it uses (and anything `extra`), or None if a value can't be hashed."""
+
+    values = tuple((_, params.get(_)) for _ in compiled.param_names)
+    key = (compiled.text, values, *extra)
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ResultCache:
+    """A thread-safe LRU cache of query results.
+
+    Holds at most `maxsize` results and `max_rows` rows in total, evicting the
+    least recently used results to make room. Each result can expire after a
+    number of seconds, and can be tagged so that all the results with a tag
+    can be invalidated at once.
+
+    Results are copied on the way in and out, so cached results can't be
+    modified by callers.
+    """
+
+    def __init__(self, maxsize=1024, max_rows=100000):
+        self.maxsize = maxsize
+        self.max_rows = max_rows
+
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self._generations = {}
+        self._rows = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                rows, expires, _ = entry
+
+                if expires is not None and time.monotonic() >= expires:
+                    self._remove(key)
+                    self.expirations += 1
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return copied_rows(rows)
+
+    def generation(self, tags):
+        """A snapshot of the invalidation state of `tags`, to pass to `put`."""
+
+        with self._lock:
+            return tuple(self._generations.get(_, 0) for _ in tags)
+
+    def put(self, key, rows, ttl=None, tags=(), generation=None):
+        """Cache `rows` under `key` for `ttl` seconds (or until evicted).
+
+        If `generation` is given, nothing is cached when any of `tags` has
+        been invalidated since the snapshot was taken, as the result may
+        already be stale.
+        """
+
+        if len(rows) > self.max_rows:
+            return
+
+        rows = copied_rows(rows)
+        tags = tuple(tags)
+        expires = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            if generation is not None:
+                current = tuple(self._generations.get(_, 0) for _ in tags)
+
+                if current != generation:
+                    return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = rows, expires, tags
+            self._rows += len(rows)
+
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+
+            while self._entries and (
+                len(self._entries) > self.maxsize or self._rows > self.max_rows
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        # caller must hold self._lock
+        rows, _, tags = self._entries.pop(key)
+        self._rows -= len(rows)
+
+        for tag in tags:
+            keys = self._tagged.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tagged[tag]
+
+    def invalidate(self, tag):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+            for key in list(self._tagged.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for tag in list(self._tagged):
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+            self._entries.clear()
+            self._tagged.clear()
+            self._rows = 0
+
+    def tags(self):
+        with self._lock:
+            return set(self._tagged)
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                size=len(self._entries),
+                rows=self._rows,
+                maxsize=self.maxsize,
+                max_rows=self.max_rows,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                invalidations=self.invalidations,
+            )
+
+
+class CacheInvalidator:
+    """Invalidates tagged results in a `ResultCache` when a notification is
+    sent on the channel of the same name as the tag, from any process.
+
+    Listens with `db.listen`/`db.notifications` in a background thread, which
+    is the only user of the listening connection. `listen(tags)` must be
+    called before running a query whose result will be cached, so that no
+    notification sent after the query starts can be missed.
+    """
+
+    def __init__(self, db, cache, poll_interval=1.0):
+        self.db = db
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.channels = set()
+
+        self._cond = Condition()
+        self._pending = set()
+        self._error = None
+        self._stop = Event()
+        self._interrupt_r, self._interrupt_w = os.pipe()
+
+        self._thread = Thread(
+            target=self._run, name="databaseci-cache-invalidator", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def _interrupt(self):
+        os.write(self._interrupt_w, b"x")
+
+    def listen(self, tags):
+        """Start listening on the channels for `tags`, waiting until the
+        listener has done so."""
+
+        with self._cond:
+            new = set(tags) - self.channels
+
+            if not new:
+                return
+
+            self._pending |= new
+            self._interrupt()
+
+            while not new <= self.channels:
+                if not self.running:
+                    raise RuntimeError("cache invalidation listener has stopped")
+                self._cond.wait(self.poll_interval)
+
+    def _start_pending(self, conn):
+        with self._cond:
+            if self._pending:
+                start_listening(conn, sorted(self._pending))
+                self.channels |= self._pending
+                self._pending = set()
+                self._cond.notify_all()
+
+    def _run(self):
+        try:
+            with self.db.listen([]) as conn:
+                notifications = self.db.notifications(
+                    conn,
+                    timeout=self.poll_interval,
+                    yield_on_timeout=True,
+                    interrupt_fd=self._interrupt_r,
+                )
+
+                for notify in notifications:
+                    if self._stop.is_set():
+                        break
+
+                    if notify is not None:
+                        self.cache.invalidate(notify.channel)
+
+                    self._start_pending(conn)
+        except Exception:
+            # with the connection gone, nothing cached can be trusted
+            self.cache.clear()
+            raise
+        finally:
+            with self._cond:
+                self._stop.set()
+                self._cond.notify_all()
+
+    def close(self):
+        self._stop.set()
+        self._interrupt()
+        self._thread.join()
+
+        os.close(self._interrupt_r)
+        os.close(self._interrupt_w)
+
+
+class CountCache:
+    """A thread-safe LRU cache of the row counts of queries, each of which
+    expires after a number of seconds."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            count, expires = entry
+
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return count
+
+    def put(self, key, count, ttl):
+        with self._lock:
+            self._entries[key] = count, time.monotonic() + ttl
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,96 @@
+from array import array
+
+from .curs import row_class
+from .rows import Rows, column_info_from_description
+
+ARRAY_TYPECODES = {
+    "int2": "q",
+    "int4": "q",
+    "int8": "q",
+    "float4": "d",
+    "float8": "d",
+}
+
+FETCH_SIZE = 10000
+
+
+class Columns(dict):
+    """Query results stored column by column, as a mapping of column name to
+    column values.
+
+    Integer and floating point columns without nulls are stored as compact
+    `array.array`s, and everything else as lists. With `numpy=True` every
+    column is converted to a NumPy array (without copying, for the
+    `array.array` columns).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.paging = None
+        self.column_info = None
+        self.row_count = 0
+
+        super().__init__(*args, **kwargs)
+
+    @property
+    def names(self):
+        return list(self.keys())
+
+    def as_rows(self):
+        cls = row_class(tuple((k, i) for i, k in enumerate(self.keys())))
+
+        rows = Rows(cls(items=values) for values in zip(*self.values()))
+        rows.column_info = dict(self.column_info)
+        return rows
+
+
+def new_column(type_name):
+    typecode = ARRAY_TYPECODES.get(type_name)
+
+    if typecode:
+        return array(typecode)
+    return []
+
+
+def numpy_column(values):
+    import numpy
+
+    if isinstance(values, array):
+        return numpy.frombuffer(values, dtype=values.typecode)
+    return numpy.array(values)
+
+
+def fetch_columns(cursor, numpy=False, fetch_size=FETCH_SIZE):
+    column_info = column_info_from_description(cursor.description)
+
+    names = [c.name for c in cursor.description]
+    columns = [new_column(column_info[_]) for _ in names]
+
+    row_count = 0
+
+    while True:
+        chunk = cursor.fetchmany(fetch_size)
+
+        if not chunk:
+            break
+
+        row_count += len(chunk)
+
+        for i, values in enumerate(zip(*chunk)):
+            column = columns[i]
+            before = len(column)
+
+            try:
+                column.extend(values)
+            except TypeError:
+                # nulls (or unexpected values) can't go in a typed array
+                column = columns[i] = column[:before].tolist()
+                column.extend(values)
+
+    if numpy:
+        columns = [numpy_column(_) for _ in columns]
+
+    result = Columns(zip(names, columns))
+    result.column_info = column_info
+    result.row_count = row_count
+
+    return result
@@ -1,5 +1,6 @@
 # Copyright DatabaseCI Pty Ltd 2022
 
+import json
 import sys
 
 import click
@@ -10,6 +11,36 @@ except ImportError:
     init_services_commands = None
 import databaseci
 
+from .formatting import format_table_of_dicts
+from .perfdiff import DEFAULT_THRESHOLD, load_queries
+from .perfdiff import perfdiff as compare_query_performance
+from .querystats import SORT_KEYS, load_stats, sorted_stats
+
+
+def milliseconds(seconds):
+    if seconds is None:
+        return ""
+    return f"{seconds * 1000:.2f}"
+
+
+def stats_row(q, query_width=60):
+    query = q["query"]
+
+    if len(query) > query_width:
+        query = query[: query_width - 3] + "..."
+
+    return dict(
+        fingerprint=q["fingerprint"],
+        calls=q["calls"],
+        total_ms=milliseconds(q["total_time"]),
+        mean_ms=milliseconds(q["mean_time"]),
+        p50_ms=milliseconds(q["p50"]),
+        p95_ms=milliseconds(q["p95"]),
+        p99_ms=milliseconds(q["p99"]),
+        rows=q["rows"],
+        query=query,
+    )
+
 
 @click.group()
 def cli():
@@ -52,6 +83,77 @@ def init_commands(cli):
             print(schemadiff_sql)
             sys.exit(2)
 
+    @cli.command(
+        help="Compare the plans (and timings) of the queries in `queries_file` between two databases, a -> b"
+    )
+    @click.option(
+        "--repeat",
+        type=int,
+        default=0,
+        help="Also run each query this many times on each database, comparing the median times",
+    )
+    @click.option(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative increase in cost or time counted as a regression (0.2 = 20%)",
+    )
+    @click.option(
+        "--fail-on-plan-change",
+        is_flag=True,
+        help="Also count any change in the shape of a plan as a regression",
+    )
+    @click.argument("queries_file", type=click.Path(exists=True, dir_okay=False))
+    @click.argument("db_url_a", type=str, nargs=1)
+    @click.argument("db_url_b", type=str, nargs=1)
+    def perfdiff(
+        queries_file, db_url_a, db_url_b, repeat, threshold, fail_on_plan_change
+    ):
+        db_a = databaseci.db(db_url_a)
+        db_b = databaseci.db(db_url_b)
+
+        queries = load_queries(queries_file)
+        comparisons = compare_query_performance(db_a, db_b, queries, repeat=repeat)
+
+        failed = False
+
+        for c in comparisons:
+            regressed = c.regressions(threshold) or (
+                fail_on_plan_change and c.shape_changed
+            )
+
+            if regressed or c.shape_changed:
+                print(c.report(threshold))
+
+            failed = failed or bool(regressed)
+
+        if failed:
+            sys.exit(2)
+
+    @cli.command(help="Show query statistics dumped with `QueryStatsRegistry.dump`")
+    @click.option(
+        "--sort",
+        "sort_by",
+        type=click.Choice(SORT_KEYS),
+        default="total_time",
+        help="Order queries by this statistic, largest first",
+    )
+    @click.option(
+        "--limit", type=int, default=20, help="Show at most this many queries"
+    )
+    @click.option("--json", "as_json", is_flag=True, help="Output as JSON lines")
+    @click.argument("stats_file", type=click.Path(exists=True, dir_okay=False))
+    def stats(stats_file, sort_by, limit, as_json):
+        queries = sorted_stats(load_stats(stats_file), sort_by, limit)
+
+        if as_json:
+            for q in queries:
+                print(json.dumps(q))
+            return
+
+        print(format_table_of_dicts([stats_row(_) for _ in queries]))
+
+
 init_commands(cli)
 if init_services_commands:
     init_services_commands(cli)
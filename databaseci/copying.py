@@ -0,0 +1,110 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+COPY_NULL = "\\N"
+
+COPY_ESCAPES = str.maketrans(
+    {
+        "\\": "\\\\",
+        "\n": "\\n",
+        "\r": "\\r",
+        "\t": "\\t",
+    }
+)
+
+
+def array_element(value):
+    if value is None:
+        return "NULL"
+
+    if isinstance(value, (list, tuple)):
+        return array_literal(value)
+
+    s = copy_value(value)
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def array_literal(values):
+    return "{" + ",".join(array_element(_) for _ in values) + "}"
+
+
+def copy_value(value):
+    # the unescaped text representation of a value, as postgres would parse it
+    if isinstance(value, str):
+        return value
+
+    if isinstance(value, bool):
+        return "t" if value else "f"
+
+    if isinstance(value, (int, float, Decimal, UUID)):
+        return str(value)
+
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+
+    if isinstance(value, timedelta):
+        return f"{value.total_seconds()} seconds"
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()
+
+    if isinstance(value, dict):
+        return json.dumps(value)
+
+    if isinstance(value, (list, tuple)):
+        return array_literal(value)
+
+    return str(value)
+
+
+def copy_field(value):
+    if value is None:
+        return COPY_NULL
+    return copy_value(value).translate(COPY_ESCAPES)
+
+
+def copy_line(row, keys):
+    return "\t".join([copy_field(row[k]) for k in keys]) + "\n"
+
+
+class CopyReader:
+    """A read-only file-like object producing rows in COPY text format.
+
+    Lines are generated on demand as psycopg2's `copy_expert` reads, so the
+    full text of the data never needs to exist at once. If given, `progress`
+    is called with the number of rows read so far every `progress_every` rows.
+    """
+
+    def __init__(self, rows, keys, progress=None, progress_every=10000):
+        self.lines = (copy_line(row, keys) for row in rows)
+        self.count = 0
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def _counted(self):
+        self.count += 1
+
+        if self.progress and not self.count % self.progress_every:
+            self.progress(self.count)
+
+    def read(self, size=-1):
+        chunks = []
+        n = 0
+
+        for line in self.lines:
+            chunks.append(line)
+            self._counted()
+            n += len(line)
+
+            if 0 <= size <= n:
+                break
+
+        return "".join(chunks)
+
+    def readline(self, size=-1):
+        for line in self.lines:
+            self._counted()
+            return line
+        return ""
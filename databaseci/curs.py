@@ -1,74 +1,58 @@
-from collections import OrderedDict
 from collections.abc import Mapping
+from functools import lru_cache
+from operator import attrgetter
 from pprint import pformat
-from typing import Iterable
 
 from psycopg2.extensions import connection as _connection
 from psycopg2.extensions import cursor as _cursor
 
 from .constants import type_codes
 
+try:
+    from _collections import _tuplegetter
+except ImportError:
 
-class DictCursorBase(_cursor):
-    """Base class for all dict-like cursors."""
+    def _tuplegetter(index, doc):
+        return property(lambda self: _tuple_getitem(self, index), doc=doc)
 
-    def __init__(self, *args, **kwargs):
-        if "row_factory" in kwargs:
-            row_factory = kwargs["row_factory"]
-            del kwargs["row_factory"]
-        else:
-            raise NotImplementedError(
-                "DictCursorBase can't be instantiated without a row factory."
-            )
-        super().__init__(*args, **kwargs)
-        self._query_executed = False
-        self._prefetch = False
-        self.row_factory = row_factory
 
-    def fetchone(self):
-        if self._prefetch:
-            res = super().fetchone()
-        if self._query_executed:
-            self._build_index()
-        if not self._prefetch:
-            res = super().fetchone()
-        return res
+RESULT_SHAPE_CACHE_SIZE = 1024
 
-    def fetchmany(self, size=None):
-        if self._prefetch:
-            res = super().fetchmany(size)
-        if self._query_executed:
-            self._build_index()
-        if not self._prefetch:
-            res = super().fetchmany(size)
-        return res
+ROW_CLASS_CACHE_SIZE = 1024
 
-    def fetchall(self):
-        if self._prefetch:
-            # breakpoint()
-            res = super().fetchall()
-        if self._query_executed:
-            self._build_index()
-        if not self._prefetch:
-            res = super().fetchall()
-        return res
+name_and_type_code = attrgetter("name", "type_code")
 
-    def __iter__(self):
-        try:
-            if self._prefetch:
-                res = super().__iter__()
-                first = next(res)
-            if self._query_executed:
-                self._build_index()
-            if not self._prefetch:
-                res = super().__iter__()
-                first = next(res)
-
-            yield first
-            while True:
-                yield next(res)
-        except StopIteration:
-            return
+_new_tuple = tuple.__new__
+_tuple_getitem = tuple.__getitem__
+
+
+class ResultShape:
+    """Metadata shared by every result with the same column names and types.
+
+    `index` (column name -> position) and `column_info` (column name -> type
+    name) are shared between all the results and rows that use them, and so
+    must not be modified.
+    """
+
+    __slots__ = ("names", "index", "column_info", "row_class")
+
+    def __init__(self, fingerprint):
+        self.names = [name for name, _ in fingerprint]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.column_info = {
+            name: type_codes.get(type_code, "unknown")
+            for name, type_code in fingerprint
+        }
+        self.row_class = row_class(tuple(self.index.items()))
+
+
+@lru_cache(maxsize=RESULT_SHAPE_CACHE_SIZE)
+def result_shape_for(fingerprint):
+    return ResultShape(fingerprint)
+
+
+def result_shape(description):
+    return result_shape_for(tuple(map(name_and_type_code, description)))
 
 
 class DictConnection(_connection):
@@ -79,75 +63,102 @@ class DictConnection(_connection):
         return super().cursor(*args, **kwargs)
 
 
-class DictCursor(DictCursorBase):
-    """A cursor that keeps a list of column name -> index mappings__.
-    .. __: https://docs.python.org/glossary.html#term-mapping
-    """
+class DictCursor(_cursor):
+    """A cursor that returns `DictRow` rows, of a class generated for the
+    columns of the result."""
+
+    def _row_class(self):
+        return result_shape(self.description).row_class
+
+    def fetchone(self):
+        row = super().fetchone()
+
+        if row is None:
+            return None
+        return _new_tuple(self._row_class(), row)
 
-    def __init__(self, *args, **kwargs):
-        kwargs["row_factory"] = DictRow
-        super().__init__(*args, **kwargs)
-        self._prefetch = True
+    def fetchmany(self, size=None):
+        if size is None:
+            rows = super().fetchmany()
+        else:
+            rows = super().fetchmany(size)
 
-    def execute(self, query, vars=None):
-        self.index = OrderedDict()
-        self._query_executed = True
-        return super().execute(query, vars)
+        if not rows:
+            return rows
 
-    def callproc(self, procname, vars=None):
-        self.index = OrderedDict()
-        self._query_executed = True
-        return super().callproc(procname, vars)
+        cls = self._row_class()
+        return [_new_tuple(cls, _) for _ in rows]
 
-    def _build_index(self):
-        if self._query_executed and self.description:
-            for i in range(len(self.description)):
-                self.index[self.description[i][0]] = i
-            self._query_executed = False
+    def fetchall(self):
+        rows = super().fetchall()
 
+        if not rows:
+            return rows
 
-class DictRow(list):
-    """A row object that allow by-column-name access to data."""
+        cls = self._row_class()
+        return [_new_tuple(cls, _) for _ in rows]
 
-    __slots__ = ("_index",)
+    def __next__(self):
+        row = super().__next__()
+        return _new_tuple(self._row_class(), row)
 
-    def __init__(self, cursor=None, *, index=None, items=None):
-        if cursor:
-            self._index = cursor.index
+    def __iter__(self):
+        rows = iter(super().__next__, None)
 
-            self[:] = [None] * len(cursor.description)
-        elif index:
-            self._index = index
+        # named cursors only have a description after the first fetch
+        for first in rows:
+            cls = self._row_class()
+            yield _new_tuple(cls, first)
+            break
+        else:
+            return
 
-        if items:
-            shortage = len(index) - len(items)
+        for row in rows:
+            yield _new_tuple(cls, row)
 
-            if shortage:
-                _items = list(items) + ([None] * shortage)
-                super().__init__(_items)
-            else:
-                super().__init__(items)
 
-    def __getitem__(self, x):
-        if not isinstance(x, (int, slice)):
-            x = self._index[x]
-        return super().__getitem__(x)
+class DictRow(tuple):
+    """A row object that allows access to data by column name, attribute, or
+    position.
 
-    def __setitem__(self, x, v):
-        if not isinstance(x, (int, slice)):
-            x = self._index[x]
-        super().__setitem__(x, v)
+    Every set of column names gets its own subclass (see `row_class`), with
+    a property per column, so rows themselves are plain tuples underneath.
+    `DictRow(index=..., items=...)` creates a row of the right class.
+    """
+
+    __slots__ = ()
+
+    _index = {}
+    _width = 0
+
+    def __new__(cls, cursor=None, *, index=None, items=None):
+        if cursor is not None:
+            index = result_shape(cursor.description).index
+
+        if cls is DictRow:
+            cls = row_class(tuple(index.items()))
+
+        items = list(items or ())
+        shortage = cls._width - len(items)
+
+        if shortage > 0:
+            items += [None] * shortage
+
+        return _new_tuple(cls, items)
+
+    def __getitem__(self, x):
+        if isinstance(x, (int, slice)):
+            return _tuple_getitem(self, x)
+        return _tuple_getitem(self, self._index[x])
 
     def items(self):
-        g = super().__getitem__
-        return ((n, g(self._index[n])) for n in self._index)
+        return ((n, _tuple_getitem(self, i)) for n, i in self._index.items())
 
     def keys(self):
         return iter(self._index)
 
     def values(self):
-        g = super().__getitem__
-        return (g(self._index[n]) for n in self._index)
+        return (_tuple_getitem(self, i) for i in self._index.values())
 
     def get(self, x, default=None):
         try:
@@ -155,41 +166,56 @@ class DictRow(list):
         except LookupError:
             return default
 
-    def __getattribute__(self, __name: str):
-        try:
-            i = object.__getattribute__(self, "_index")[__name]
-            return super().__getitem__(i)
-        except LookupError:
-            pass
-
-        return object.__getattribute__(self, __name)
-
     def as_dict(self):
-        return dict(self.items())
+        return {n: _tuple_getitem(self, i) for n, i in self._index.items()}
 
     def __contains__(self, x):
         return x in self._index
 
     def __reduce__(self):
-        # this is apparently useless, but it fixes #1073
-        return super().__reduce__()
-
-    def __getstate__(self):
-        return self[:], self._index.copy()
-
-    def __setstate__(self, data):
-        self[:] = data[0]
-        self._index = data[1]
+        return restore_row, (tuple(self._index.items()), tuple(self))
 
     def __eq__(self, other):
         if isinstance(other, DictRow):
-            return self.as_dict() == other.as_dict()
+            return DictRow.as_dict(self) == DictRow.as_dict(other)
 
         if isinstance(other, Mapping):
-            return self.as_dict() == other
+            return DictRow.as_dict(self) == other
 
-        else:
-            return self == other
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
 
     def __str__(self):
-        return pformat(self.as_dict(), width=-1)
+        return pformat(DictRow.as_dict(self), width=-1)
+
+
+@lru_cache(maxsize=ROW_CLASS_CACHE_SIZE)
+def row_class(index_items):
+    """The `DictRow` subclass for rows with the given (name, position) pairs.
+
+    Columns with names that are valid identifiers (and don't start with an
+    underscore) are available as attributes, taking precedence over methods
+    of the same name, as with `row.count` for a `count` column.
+    """
+
+    index = dict(index_items)
+
+    namespace = dict(
+        __slots__=(),
+        _index=index,
+        _width=max(index.values(), default=-1) + 1,
+    )
+
+    for name, i in index.items():
+        if name.isidentifier() and not name.startswith("_"):
+            namespace[name] = _tuplegetter(i, f"Column {name}")
+
+    return type("DictRow", (DictRow,), namespace)
+
+
+def restore_row(index_items, values):
+    return _new_tuple(row_class(index_items), values)
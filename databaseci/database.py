@@ -1,84 +1,174 @@
 import getpass
+from collections.abc import Mapping
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from contextlib import contextmanager
 from inspect import currentframe
+from itertools import count
 from pathlib import Path
-from threading import get_ident
+from threading import Event, Lock
+from time import perf_counter
 
 from psycopg2 import connect as pgconnect
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR as IN_ERROR
 from psycopg2.extras import execute_batch, execute_values
-from psycopg2.pool import ThreadedConnectionPool
 
-from .constants import type_codes
+from .caching import CacheInvalidator, CountCache, ResultCache, query_cache_key
+from .columnar import Columns, fetch_columns
 from .createdrop import DatabaseCreateDrop
 from .curs import DictCursor
-from .inserting import Inserting
+from .explain import Plan, explain_query
+from .hooks import QueryHooks
+from .inserting import Inserting, values_template
 from .notify import ListenNotify
-from .paging import get_paged_query, get_paged_rows
-from .psyco import reformat_bind_params
-from .rows import Rows
+from .paging import (
+    get_count_query,
+    get_count_result,
+    get_paged_query,
+    get_paged_rows,
+    paging_cache_key,
+    split_count_options,
+)
+from .pagingcheck import checked_paging, paging_check
+from .pool import ConnectionPool
+from .prepared import PreparedStatements
+from .psyco import compile_query
+from .querystats import QueryStatsRegistry
+from .rows import Rows, StreamedRows, column_info_from_description
 from .schemas import Schemas
 from .urls import URL
 
-conns = {}
-
-
-def get_conn(db_url):
-    tid = get_ident()
-
-    if db_url not in conns:
-        conns[db_url] = ThreadedConnectionPool(1, 1024, db_url)
-
-    pool = conns[db_url]
-
-    conn = pool.getconn(tid)
-
-    return conn
-
-
-def put_conn(conn, db_url):
-    tid = get_ident()
-
-    pool = conns[db_url]
-    pool.putconn(conn, tid)
+stream_cursor_ids = count(1)
 
 
 class Transaction(Inserting):
     def __init__(self):
         self._back = 0
+        self._autoclosing = False
+        self.prepared = None
+        self.hooks = None
+        self.pool_wait = 0.0
+        self.count_cache = None
 
     def ex(self, *args, **kwargs):
         self.c.execute(*args, **kwargs)
 
-    def execute(self, *args, **kwargs) -> Rows:
-        self.c.execute(*args, **kwargs)
+    def _execute_on(self, cursor, query, vars):
+        if self.prepared is None or not isinstance(vars, Mapping):
+            cursor.execute(query, vars)
+        elif not self.prepared.execute(cursor, compile_query(query), vars):
+            cursor.execute(query, vars)
+
+    def _param_count(self, query, vars):
+        if isinstance(vars, Mapping):
+            return len(compile_query(query).param_names)
+        return len(vars or ())
+
+    def execute(self, query, vars=None) -> Rows:
+        if self.hooks is not None:
+            return self.hooks.trace(
+                self,
+                "execute",
+                query,
+                self._param_count(query, vars),
+                lambda event: self._execute(query, vars, event),
+            )
+        return self._execute(query, vars)
+
+    def _execute(self, query, vars=None, event=None) -> Rows:
+        self._execute_on(self.c, query, vars)
+
+        if event is not None:
+            event.executed()
 
         if self.c.description is None:
             return None
 
         fetched = self.c.fetchall()
-        descr = list(self.c.description)
 
         rows = Rows(fetched)
 
         rows.paging = None
 
-        column_info = {c.name: type_codes.get(c.type_code, "unknown") for c in descr}
-
-        rows.column_info = column_info
+        rows.column_info = column_info_from_description(self.c.description)
 
         return rows
 
-    def qvalues(self, query, values, fetch=True):
-        keylist = list(values[0].keys())
+    def execute_streamed(self, query, params=None, itersize=None) -> StreamedRows:
+        if self._autoclosing:
+            raise ValueError(
+                "stream=True needs an open transaction, eg: "
+                "with db.t() as t: t.q(..., stream=True)"
+            )
 
-        keylist = [f":{_}" for _ in keylist]
+        conn = self.c.connection
 
-        param_string = f"({', '.join(k for k in keylist)})"
+        curs = conn.cursor(
+            f"databaseci_stream_{next(stream_cursor_ids)}",
+            cursor_factory=DictCursor,
+            withhold=conn.autocommit,
+        )
+
+        if itersize:
+            curs.itersize = itersize
+
+        if self.hooks is not None:
+            # rows are fetched later, as they're iterated over
+            self.hooks.trace(
+                self,
+                "stream",
+                query,
+                self._param_count(query, params),
+                lambda event: curs.execute(query, params),
+            )
+        else:
+            curs.execute(query, params)
+
+        return StreamedRows(curs)
+
+    def execute_columnar(self, query, vars=None, numpy=False) -> Columns:
+        if self.hooks is not None:
+            return self.hooks.trace(
+                self,
+                "columnar",
+                query,
+                self._param_count(query, vars),
+                lambda event: self._execute_columnar(query, vars, numpy, event),
+            )
+        return self._execute_columnar(query, vars, numpy)
+
+    def _execute_columnar(self, query, vars=None, numpy=False, event=None):
+        with self.c.connection.cursor() as curs:
+            self._execute_on(curs, query, vars)
+
+            if event is not None:
+                event.executed()
+
+            if curs.description is None:
+                return None
+
+            return fetch_columns(curs, numpy=numpy)
+
+    def qvalues(self, query, values, fetch=True, page_size=100):
+        if self.hooks is not None:
+            return self.hooks.trace(
+                self,
+                "qvalues",
+                query,
+                len(values) * len(values[0]),
+                lambda event: self._qvalues(query, values, fetch, page_size),
+            )
+        return self._qvalues(query, values, fetch, page_size)
 
-        template = reformat_bind_params(param_string)
+    def _qvalues(self, query, values, fetch=True, page_size=100):
+        template = values_template(values[0].keys())
 
         fetched = execute_values(
-            cur=self.c, sql=query, argslist=values, fetch=fetch, template=template
+            cur=self.c,
+            sql=query,
+            argslist=values,
+            fetch=fetch,
+            template=template,
+            page_size=page_size,
         )
 
         if fetched:
@@ -88,11 +178,7 @@ class Transaction(Inserting):
 
             rows.paging = None
 
-            column_info = {
-                c.name: type_codes.get(c.type_code, "unknown") for c in descr
-            }
-
-            rows.column_info = column_info
+            rows.column_info = column_info_from_description(descr)
 
             return rows
 
@@ -104,6 +190,10 @@ class Transaction(Inserting):
         context=False,
         paging=None,
         fail_on_empty=False,
+        stream=False,
+        itersize=None,
+        columnar=False,
+        explain=None,
         **kwargs,
     ):
 
@@ -112,7 +202,17 @@ class Transaction(Inserting):
                 raise ValueError("Error: Empty query.")
             else:
                 return None
-        query = reformat_bind_params(query)
+        compiled = compile_query(query)
+        query = compiled.text
+
+        if stream and paging:
+            raise ValueError("stream and paging can't be used together")
+
+        if columnar and (stream or paging):
+            raise ValueError("columnar can't be used with stream or paging")
+
+        if explain and (stream or columnar):
+            raise ValueError("explain can't be used with stream or columnar")
 
         if context:
             frame = currentframe()
@@ -135,19 +235,214 @@ class Transaction(Inserting):
             if kwargs:
                 _params.update(kwargs)
 
+            compiled.check_params(_params)
+
             if paging:
+                paging, count, count_ttl = split_count_options(paging)
+                check = paging.pop("check", None)
+
+                if check:
+                    checked = checked_paging(self, query, paging, _params)
+                    checked.report(check)
+
+                unpaged, unpaged_params = query, dict(_params)
                 query, _params = get_paged_query(query, _params, **paging)
 
+            if explain:
+                return self.explain(query, _params, explain)
+
+            if stream:
+                return self.execute_streamed(query, _params, itersize=itersize)
+
+            if columnar:
+                numpy = columnar == "numpy"
+                return self.execute_columnar(query, _params, numpy=numpy)
+
             rows = self.execute(query, _params)
 
             if paging:
                 rows = get_paged_rows(rows, paging)
 
+                if count:
+                    total = None
+
+                    # with every row on the page, there's nothing to count
+                    if not rows.paging.is_all:
+                        total = self.count_total(
+                            unpaged, unpaged_params, count, count_ttl
+                        )
+                    rows.paging.set_total(total, count)
+
             return rows
         finally:
             if context:
                 del frame
 
+    def count_total(self, query, params=None, count="exact", ttl=None):
+        """The number of rows `query` returns: counted exactly (`"exact"`),
+        counted up to a maximum of N (`"capped:N"`), or estimated by the
+        planner (`"estimate"`), which costs no more than planning the query.
+
+        With a `ttl`, counts are cached (per query and parameters) for that
+        many seconds, in the database's `count_cache`. This is what the
+        `count` paging option uses, with a ttl of `count_ttl` (by default, 60
+        seconds).
+        """
+
+        compiled = compile_query(query)
+        params = params or {}
+
+        cache = self.count_cache if ttl else None
+        key = None
+
+        if cache is not None:
+            key = query_cache_key(compiled, params, count)
+
+        if key is not None:
+            total = cache.get(key)
+
+            if total is not None:
+                return total
+
+        rows = self.execute(get_count_query(compiled.text, count), params)
+        total = get_count_result(rows, count)
+
+        if key is not None:
+            cache.put(key, total, ttl)
+        return total
+
+    def check_paging(
+        self, query, order_by, params=None, *, on_full_sort="warn", mode="wrap"
+    ):
+        """Check that paging `query` by `order_by` can read rows in order from
+        an index, rather than sorting the whole query for every page.
+
+        Returns a `PagingCheck`, and when there's a full sort with no index
+        that could avoid it, warns with (or with `on_full_sort="raise"`,
+        raises) a message suggesting an index. The same check can be run on
+        every paged query with a `check` paging option of "warn" or "raise".
+        `mode` is the paging mode to check, "wrap" or "inline".
+        """
+
+        check = paging_check(self, query, order_by, params, mode)
+        check.report(on_full_sort)
+        return check
+
+    def iter_pages(
+        self,
+        query,
+        params=None,
+        *,
+        order_by,
+        per_page=100,
+        bookmark=None,
+        backwards=False,
+        mode="wrap",
+        **kwargs,
+    ):
+        """Walk through every page of `query`, yielding each page of rows in
+        turn (with its `paging` details), using keyset seeks from the last row
+        of each page (or the first, with `backwards=True`).
+
+        Every page after the first runs the same statement (prepared, if the
+        database has `prepared_statements` enabled), with only the bookmark
+        parameters changing.
+        """
+
+        while True:
+            paging = dict(
+                order_by=order_by,
+                per_page=per_page,
+                bookmark=bookmark,
+                backwards=backwards,
+                mode=mode,
+            )
+
+            rows = self.q(query, params, paging=paging, **kwargs)
+
+            if rows:
+                yield rows
+
+            # has_after: there are more rows in the direction of the walk
+            if not rows.paging.has_after:
+                return
+
+            bookmark = rows.paging.prev if backwards else rows.paging.next
+
+    def iter_rows(self, query, params=None, **kwargs):
+        """Every row of `query`, fetched a page at a time (see `iter_pages`)."""
+
+        for page in self.iter_pages(query, params, **kwargs):
+            yield from page
+
+    def explain(self, query, params=None, mode="plan"):
+        """The `Plan` of `query`, from `EXPLAIN (FORMAT JSON)`.
+
+        With `mode="analyze"` the query is run (with `ANALYZE, BUFFERS`) to
+        get actual timings and buffer usage, so any changes it makes happen
+        too, unless the transaction is rolled back.
+        """
+
+        rows = self.execute(explain_query(query, mode), params)
+        return Plan(rows[0][0])
+
+    def qmany(self, query, params_list, *, page_size=100, rowcounts=False):
+        """Run `query` once for each set of parameters in `params_list` (any
+        iterable of mappings).
+
+        The query is compiled once, and statements are sent `page_size` at a
+        time with `execute_batch`. With `rowcounts=True` the statements are
+        instead run one at a time as a prepared statement, and a list of the
+        number of rows affected by each is returned.
+        """
+
+        compiled = compile_query(query)
+
+        if self.hooks is not None:
+            counted = []
+
+            def run(event):
+                result = self._qmany(
+                    compiled, params_list, counted, page_size, rowcounts
+                )
+                event.param_count = len(counted) * len(compiled.param_names)
+                return result
+
+            return self.hooks.trace(self, "qmany", compiled.text, None, run)
+
+        return self._qmany(compiled, params_list, None, page_size, rowcounts)
+
+    def _qmany(self, compiled, params_list, counted, page_size, rowcounts):
+        def checked():
+            for params in params_list:
+                compiled.check_params(params)
+
+                if counted is not None:
+                    counted.append(None)
+                yield params
+
+        if not rowcounts:
+            execute_batch(self.c, compiled.text, checked(), page_size=page_size)
+            return None
+
+        prepared = self.prepared or PreparedStatements(self.c.connection, 1)
+        counts = []
+
+        try:
+            for params in checked():
+                if not prepared.execute(self.c, compiled, params):
+                    self.c.execute(compiled.text, params)
+                counts.append(self.c.rowcount)
+        finally:
+            # in an aborted transaction, a deallocate would only replace the
+            # error, and the statement goes with the connection anyway
+            aborted = self.c.connection.info.transaction_status == IN_ERROR
+
+            if prepared is not self.prepared and not aborted:
+                prepared.clear(self.c)
+
+        return counts
+
     def q_from_file(self, path, *args, **kwargs):
         query = Path(path).resolve().read_text()
         return self.q(query, *args, **kwargs)
@@ -160,7 +455,7 @@ class Transaction(Inserting):
 
 
 @contextmanager
-def autocommit_transaction(db_url):
+def autocommit_transaction(db_url, hooks=None):
     conn = pgconnect(db_url)
 
     conn.autocommit = True
@@ -169,6 +464,7 @@ def autocommit_transaction(db_url):
         with conn.cursor(cursor_factory=DictCursor) as curs:
             t = Transaction()
             t.c = curs
+            t.hooks = hooks or None
             yield t
     finally:
         conn.close()
@@ -187,37 +483,164 @@ def autocommit_connection(db_url):
 
 
 @contextmanager
-def transaction(db_url, cursor_factory=DictCursor):
-    conn = get_conn(db_url)
+def read_transaction(pool, hooks=None):
+    # single statements on a read-only autocommit connection, with no
+    # begin/commit round trips and a cursor reused between calls
+    start = perf_counter()
+    conn = pool.getconn()
+    pool_wait = perf_counter() - start
+
+    try:
+        t = Transaction()
+        t.c = pool.cursor(conn)
+        t.prepared = pool.statement_cache(conn)
+        t.hooks = hooks or None
+        t.pool_wait = pool_wait
+        yield t
+    finally:
+        pool.putconn(conn)
+
+
+@contextmanager
+def transaction(pool, cursor_factory=DictCursor, hooks=None):
+    start = perf_counter()
+    conn = pool.getconn()
+    pool_wait = perf_counter() - start
 
     try:
         with conn:
             with conn.cursor(cursor_factory=cursor_factory) as curs:
                 t = Transaction()
                 t.c = curs
+                t.prepared = pool.statement_cache(conn)
+                t.hooks = hooks or None
+                t.pool_wait = pool_wait
                 yield t
     finally:
-        put_conn(conn, db_url)
+        pool.putconn(conn)
 
 
-def db(url=None):
-    return Database(url)
+def db(url=None, **kwargs):
+    return Database(url, **kwargs)
 
 
-class Database(DatabaseCreateDrop, Schemas, ListenNotify):
-    def __init__(self, url=None):
+def normalized_url(url=None):
+    if url is None:
+        url = getpass.getuser()
+
+    _url = URL(url)
 
-        if url is None:
-            url = getpass.getuser()
+    if not _url.scheme or _url.scheme == "postgres":
+        _url.scheme = "postgresql"
 
-        _url = URL(url)
+    return _url
 
-        if not _url.scheme or _url.scheme == "postgres":
-            _url.scheme = "postgresql"
+
+class Database(DatabaseCreateDrop, Schemas, ListenNotify):
+    """A database, and a pool of connections to it."""
+
+    def __init__(
+        self,
+        url=None,
+        *,
+        pool_min=1,
+        pool_max=10,
+        pool_timeout=30.0,
+        pool_max_idle=300.0,
+        pool_max_lifetime=3600.0,
+        pool_check_after=1.0,
+        prepared_statements=0,
+        fast_reads=False,
+        result_cache_size=1024,
+        result_cache_rows=100000,
+        query_stats=False,
+        query_stats_size=1000,
+        count_cache_size=1024,
+    ):
+
+        _url = normalized_url(url)
 
         self.URL = _url
         self.url = str(_url)
 
+        self.pool_options = dict(
+            pool_min=pool_min,
+            pool_max=pool_max,
+            pool_timeout=pool_timeout,
+            pool_max_idle=pool_max_idle,
+            pool_max_lifetime=pool_max_lifetime,
+            pool_check_after=pool_check_after,
+            prepared_statements=prepared_statements,
+        )
+        self.fast_reads = fast_reads
+        self.hooks = QueryHooks()
+
+        if query_stats:
+            self.query_stats_registry = QueryStatsRegistry(query_stats_size)
+            self.hooks.on_after(self.query_stats_registry.record)
+        else:
+            self.query_stats_registry = None
+        self.result_cache = ResultCache(result_cache_size, result_cache_rows)
+        self.count_cache = CountCache(count_cache_size)
+        self._cache_invalidator = None
+        self._pool = None
+        self._read_pool = None
+        self._pool_lock = Lock()
+
+    def _new_pool(self, readonly=False):
+        o = self.pool_options
+
+        return ConnectionPool(
+            self.url,
+            minconn=o["pool_min"],
+            maxconn=o["pool_max"],
+            timeout=o["pool_timeout"],
+            max_idle=o["pool_max_idle"],
+            max_lifetime=o["pool_max_lifetime"],
+            check_after=o["pool_check_after"],
+            readonly=readonly,
+            prepared_statements=o["prepared_statements"],
+        )
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self._new_pool()
+        return self._pool
+
+    @property
+    def read_pool(self):
+        if self._read_pool is None:
+            with self._pool_lock:
+                if self._read_pool is None:
+                    self._read_pool = self._new_pool(readonly=True)
+        return self._read_pool
+
+    def pool_stats(self):
+        if self._pool is None:
+            return None
+        return self._pool.stats()
+
+    def read_pool_stats(self):
+        if self._read_pool is None:
+            return None
+        return self._read_pool.stats()
+
+    def close(self):
+        with self._pool_lock:
+            for pool in (self._pool, self._read_pool):
+                if pool is not None:
+                    pool.closeall()
+
+            self._pool = None
+            self._read_pool = None
+
+            if self._cache_invalidator is not None:
+                self._cache_invalidator.close()
+                self._cache_invalidator = None
+
     @property
     def url_object(self):
         return URL(self.url)
@@ -230,7 +653,7 @@ class Database(DatabaseCreateDrop, Schemas, ListenNotify):
 
         if is_self and allow_self is False:
             raise ValueError("sibling must not be the same database")
-        return db(str(sibling_url))
+        return db(str(sibling_url), fast_reads=self.fast_reads, **self.pool_options)
 
     @property
     def name(self):
@@ -238,12 +661,24 @@ class Database(DatabaseCreateDrop, Schemas, ListenNotify):
 
     @contextmanager
     def t(self):
-        with transaction(self.url) as t:
+        with transaction(self.pool, hooks=self.hooks) as t:
+            t.count_cache = self.count_cache
+            yield t
+
+    @contextmanager
+    def t_read(self):
+        """A transaction on the pool of read-only autocommit connections, with
+        no begin or commit, as used by `db.q` with `fast_reads=True` (or
+        `fast_read=True` per call)."""
+
+        with read_transaction(self.read_pool, hooks=self.hooks) as t:
+            t.count_cache = self.count_cache
             yield t
 
     @contextmanager
     def t_autocommit(self):
-        with autocommit_transaction(self.url) as t:
+        with autocommit_transaction(self.url, hooks=self.hooks) as t:
+            t.count_cache = self.count_cache
             yield t
 
     @contextmanager
@@ -253,17 +688,222 @@ class Database(DatabaseCreateDrop, Schemas, ListenNotify):
 
     @contextmanager
     def _t_namedtuple(self):
-        with transaction(self.url, cursor_factory=DictCursor) as t:
+        with transaction(self.pool, cursor_factory=DictCursor, hooks=self.hooks) as t:
+            t.count_cache = self.count_cache
             yield t
 
     def autocommit(self, *args, **kwargs):
         with self.t_autocommit() as t:
             t.q(*args, **kwargs)
 
+    def iter_pages(self, query, params=None, *, prefetch=False, **kwargs):
+        """Walk through every page of `query`, as with `Transaction.iter_pages`.
+
+        Without `prefetch`, the whole walk runs in one transaction, held open
+        until the iteration finishes. With `prefetch=True`, each page is
+        fetched in its own transaction on a background thread, and the next
+        page is fetched while the current one is being processed, at the cost
+        of the pages not coming from a single consistent snapshot.
+        """
+
+        if not prefetch:
+            with self.t() as t:
+                yield from t.iter_pages(query, params, **kwargs)
+            return
+
+        order_by = kwargs.pop("order_by")
+        per_page = kwargs.pop("per_page", 100)
+        bookmark = kwargs.pop("bookmark", None)
+        backwards = kwargs.pop("backwards", False)
+        mode = kwargs.pop("mode", "wrap")
+
+        def fetch(bookmark):
+            paging = dict(
+                order_by=order_by,
+                per_page=per_page,
+                bookmark=bookmark,
+                backwards=backwards,
+                mode=mode,
+            )
+
+            with self.t() as t:
+                return t.q(query, params, paging=paging, **kwargs)
+
+        with ThreadPoolExecutor(1) as executor:
+            pending = executor.submit(fetch, bookmark)
+
+            try:
+                while pending is not None:
+                    rows = pending.result()
+                    pending = None
+
+                    if rows.paging.has_after:
+                        p = rows.paging
+                        bookmark = p.prev if backwards else p.next
+                        pending = executor.submit(fetch, bookmark)
+
+                    if rows:
+                        yield rows
+            finally:
+                if pending is not None:
+                    pending.cancel()
+
+    def iter_rows(self, query, params=None, **kwargs):
+        """Every row of `query`, fetched a page at a time (see `iter_pages`)."""
+
+        for page in self.iter_pages(query, params, **kwargs):
+            yield from page
+
+    def q_parallel(self, queries, *, max_workers=None, fast_read=None):
+        """Run independent queries concurrently, each on its own pooled
+        connection, returning their results (as from `db.q`) in input order.
+
+        `queries` is a list of `(query, params)` pairs (or plain query
+        strings). At most `max_workers` queries run at once, and never more
+        than the pool's maximum size. If any query fails, queries that
+        haven't started are skipped, those still running are cancelled on the
+        server, and the first error is raised.
+        """
+
+        queries = [(_, None) if isinstance(_, str) else _ for _ in queries]
+
+        if not queries:
+            return []
+
+        if fast_read is None:
+            fast_read = self.fast_reads
+
+        workers = self.pool_options["pool_max"]
+
+        if max_workers:
+            workers = min(workers, max_workers)
+
+        workers = min(workers, len(queries))
+
+        failed = Event()
+        running = set()
+        running_lock = Lock()
+
+        def run(query, params):
+            if failed.is_set():
+                return None
+
+            with self.t_read() if fast_read else self.t() as t:
+                conn = t.c.connection
+
+                with running_lock:
+                    running.add(conn)
+
+                try:
+                    if failed.is_set():
+                        return None
+                    return t.q(query, params)
+                finally:
+                    with running_lock:
+                        running.discard(conn)
+
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [executor.submit(run, q, p) for q, p in queries]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+
+            errors = [f for f in futures if f in done and f.exception()]
+
+            if errors:
+                failed.set()
+
+                for f in futures:
+                    f.cancel()
+
+                with running_lock:
+                    for conn in running:
+                        conn.cancel()
+
+                raise errors[0].exception()
+
+        return [f.result() for f in futures]
+
+    @property
+    def cache_invalidator(self):
+        with self._pool_lock:
+            invalidator = self._cache_invalidator
+
+            if invalidator is None or not invalidator.running:
+                invalidator = CacheInvalidator(self, self.result_cache)
+                self._cache_invalidator = invalidator
+            return invalidator
+
+    def _cached_q(self, query, params=None, *, cache_ttl=None, cache_tags=(), **kwargs):
+        """`db.q(..., cache_ttl=seconds, cache_tags=[...])`: the result is cached
+        on the query, the parameters it uses and (for each page of a paged
+        query) the paging options. See `invalidate_cache` for tags."""
+
+        for option in ("context", "stream", "columnar", "explain"):
+            if kwargs.get(option):
+                raise ValueError(f"{option} can't be used with cache_ttl/cache_tags")
+
+        if isinstance(cache_tags, str):
+            cache_tags = [cache_tags]
+
+        compiled = compile_query(query)
+
+        _params = dict(params or {})
+        _params.update(kwargs)
+
+        paging = kwargs.get("paging")
+        extra = (paging_cache_key(paging),) if paging else ()
+        key = query_cache_key(compiled, _params, *extra)
+
+        if key is None:
+            return self.q(query, params, **kwargs)
+
+        cache = self.result_cache
+        rows = cache.get(key)
+
+        if rows is not None:
+            return rows
+
+        generation = cache.generation(cache_tags)
+
+        if cache_tags:
+            self.cache_invalidator.listen(cache_tags)
+
+        rows = self.q(query, params, **kwargs)
+
+        if rows is not None:
+            cache.put(key, rows, cache_ttl, cache_tags, generation)
+        return rows
+
+    def invalidate_cache(self, *tags):
+        """Evict cached results with any of `tags`, here and (by notifying on
+        the channel of each tag) in every other process listening for them."""
+
+        with self.t_autocommit() as t:
+            for tag in tags:
+                self.result_cache.invalidate(tag)
+                t.notify(tag, "")
+
+    def query_stats(self, sort_by="total_time", limit=None):
+        """Statistics per normalized query, most expensive first (or by
+        `sort_by`: calls, mean_time, p99 or rows), as collected with
+        `db(..., query_stats=True)`."""
+
+        if self.query_stats_registry is None:
+            raise ValueError("query stats are off, use db(..., query_stats=True)")
+        return self.query_stats_registry.stats(sort_by, limit)
+
+    def cache_stats(self):
+        return self.result_cache.stats()
+
     def __getattr__(self, name):
         def method(*args, **kwargs):
-            with self.t() as t:
+            if name == "q" and ("cache_ttl" in kwargs or "cache_tags" in kwargs):
+                return self._cached_q(*args, **kwargs)
+
+            fast = name == "q" and kwargs.pop("fast_read", self.fast_reads)
+
+            with self.t_read() if fast else self.t() as t:
                 t._back = 1
+                t._autoclosing = True
                 m = getattr(t, name)
                 return m(*args, **kwargs)
 
@@ -0,0 +1,183 @@
+EXPLAIN_OPTIONS = {
+    "plan": "format json",
+    "analyze": "format json, analyze, buffers",
+}
+
+
+def explain_query(query, mode):
+    try:
+        options = EXPLAIN_OPTIONS[mode]
+    except KeyError:
+        raise ValueError(
+            f"explain must be one of {', '.join(EXPLAIN_OPTIONS)}, not {mode!r}"
+        )
+
+    return f"explain ({options})\n{query}"
+
+
+class PlanNode:
+    """One node of a query plan, wrapping the node's EXPLAIN JSON (which is
+    available by key, eg. `node["Node Type"]`)."""
+
+    def __init__(self, data):
+        self.data = data
+        self.children = [PlanNode(_) for _ in data.get("Plans", ())]
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    @property
+    def node_type(self):
+        return self.data["Node Type"]
+
+    @property
+    def relation(self):
+        return self.data.get("Relation Name")
+
+    @property
+    def index(self):
+        return self.data.get("Index Name")
+
+    @property
+    def label(self):
+        label = self.node_type
+
+        if self.relation:
+            label += f" on {self.relation}"
+        if self.index:
+            label += f" using {self.index}"
+        return label
+
+    def walk(self):
+        yield self
+
+        for child in self.children:
+            yield from child.walk()
+
+    @property
+    def shape(self):
+        """The node types, relations and indexes of the plan, without any
+        costs or timings, as nested tuples that can be compared between
+        plans."""
+
+        return (
+            self.node_type,
+            self.relation,
+            self.index,
+            tuple(_.shape for _ in self.children),
+        )
+
+    def outline(self, depth=0):
+        lines = ["  " * depth + self.label]
+
+        for child in self.children:
+            lines.extend(child.outline(depth + 1))
+        return lines
+
+    def __repr__(self):
+        return f"PlanNode({self.label})"
+
+
+class Plan:
+    """A parsed `EXPLAIN (FORMAT JSON)` query plan, from `q(..., explain=...)`.
+
+    Costs are the planner's estimates. Actual times (in milliseconds) and
+    buffer counts are only available for plans run with `explain="analyze"`,
+    and are None otherwise. Buffer counts of a node include those of its
+    children, so the root's counts are the totals.
+    """
+
+    def __init__(self, data):
+        if isinstance(data, list):
+            data = data[0]
+
+        self.data = data
+        self.root = PlanNode(data["Plan"])
+
+    @property
+    def analyzed(self):
+        return "Actual Total Time" in self.root.data
+
+    @property
+    def startup_cost(self):
+        return self.root["Startup Cost"]
+
+    @property
+    def total_cost(self):
+        return self.root["Total Cost"]
+
+    @property
+    def plan_rows(self):
+        return self.root["Plan Rows"]
+
+    @property
+    def actual_rows(self):
+        return self.root.get("Actual Rows")
+
+    @property
+    def actual_time(self):
+        return self.root.get("Actual Total Time")
+
+    @property
+    def planning_time(self):
+        return self.data.get("Planning Time")
+
+    @property
+    def execution_time(self):
+        return self.data.get("Execution Time")
+
+    @property
+    def shared_hit(self):
+        return self.root.get("Shared Hit Blocks")
+
+    @property
+    def shared_read(self):
+        return self.root.get("Shared Read Blocks")
+
+    @property
+    def nodes(self):
+        return list(self.root.walk())
+
+    @property
+    def node_types(self):
+        return [_.node_type for _ in self.root.walk()]
+
+    @property
+    def shape(self):
+        return self.root.shape
+
+    def seq_scans(self):
+        """Names of the relations read with sequential scans."""
+
+        return [_.relation for _ in self.root.walk() if _.node_type == "Seq Scan"]
+
+    def uses_index(self, name=None):
+        """Whether any node uses an index (or the index `name`, if given)."""
+
+        for node in self.root.walk():
+            index = node.index
+
+            if index and (name is None or index == name):
+                return True
+        return False
+
+    def totals(self):
+        return dict(
+            total_cost=self.total_cost,
+            plan_rows=self.plan_rows,
+            actual_rows=self.actual_rows,
+            actual_time=self.actual_time,
+            planning_time=self.planning_time,
+            execution_time=self.execution_time,
+            shared_hit=self.shared_hit,
+            shared_read=self.shared_read,
+        )
+
+    def __str__(self):
+        return "\n".join(self.root.outline())
+
+    def __repr__(self):
+        return f"Plan(cost={self.total_cost}, time={self.actual_time})"
@@ -0,0 +1,241 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from threading import Lock, local
+
+from .psyco import normalize_query
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(text):
+    """A short, stable identifier for a query, the same for all queries that
+    differ only in their literal values (see `normalize_query`)."""
+
+    normalized = normalize_query(text)
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def value_size(value):
+    if value is None:
+        return 0
+
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return len(value)
+    return len(str(value))
+
+
+class QueryEvent:
+    """What happened when a query ran, as passed to `QueryHooks` callbacks.
+
+    Times are in seconds. `execute_time` covers sending the query and
+    receiving the results (psycopg2 receives the full result before
+    `execute` returns, except for streamed results), and `fetch_time` covers
+    building the result rows. `wall_time` is the total. The server's own
+    execution time isn't reported by the protocol, so isn't available here.
+
+    `bytes` is the size of the result values in their text form, roughly
+    what was fetched over the wire, and is only computed if asked for.
+    """
+
+    __slots__ = (
+        "kind",
+        "query",
+        "param_count",
+        "pool_wait",
+        "rows",
+        "result",
+        "error",
+        "started",
+        "execute_time",
+        "fetch_time",
+        "wall_time",
+        "_bytes",
+    )
+
+    def __init__(self, kind, query, param_count, pool_wait):
+        self.kind = kind
+        self.query = query
+        self.param_count = param_count
+        self.pool_wait = pool_wait
+        self.rows = None
+        self.result = None
+        self.error = None
+        self.started = time.perf_counter()
+        self.execute_time = None
+        self.fetch_time = None
+        self.wall_time = None
+        self._bytes = None
+
+    @property
+    def fingerprint(self):
+        return fingerprint(self.query)
+
+    @property
+    def normalized(self):
+        return normalize_query(self.query)
+
+    def executed(self):
+        self.execute_time = time.perf_counter() - self.started
+
+    def finished(self, result=None, error=None):
+        self.wall_time = time.perf_counter() - self.started
+
+        if self.execute_time is None:
+            self.execute_time = self.wall_time
+
+        self.fetch_time = self.wall_time - self.execute_time
+        self.result = result
+        self.error = error
+
+        if isinstance(result, dict):
+            self.rows = result.row_count
+        elif isinstance(result, list):
+            self.rows = len(result)
+
+    @property
+    def bytes(self):
+        if self._bytes is None:
+            result = self.result
+
+            if isinstance(result, dict):
+                values = (v for column in result.values() for v in column)
+            elif isinstance(result, list):
+                values = (v for row in result for v in row)
+            else:
+                values = ()
+
+            self._bytes = sum(map(value_size, values))
+        return self._bytes
+
+    def as_dict(self):
+        return dict(
+            kind=self.kind,
+            query=self.query,
+            fingerprint=self.fingerprint,
+            param_count=self.param_count,
+            rows=self.rows,
+            pool_wait=self.pool_wait,
+            execute_time=self.execute_time,
+            fetch_time=self.fetch_time,
+            wall_time=self.wall_time,
+            error=None if self.error is None else repr(self.error),
+        )
+
+    def __repr__(self):
+        return f"QueryEvent({self.kind}, {self.fingerprint}, rows={self.rows})"
+
+
+class Span:
+    """The queries run (in the current thread) inside a `QueryHooks.span`."""
+
+    def __init__(self, name):
+        self.name = name
+        self.events = []
+        self.started = time.perf_counter()
+        self.wall_time = None
+
+    @property
+    def query_count(self):
+        return len(self.events)
+
+    @property
+    def query_time(self):
+        return sum(_.wall_time for _ in self.events)
+
+    @property
+    def rows(self):
+        return sum(_.rows or 0 for _ in self.events)
+
+    def __repr__(self):
+        return f"Span({self.name!r}, queries={self.query_count})"
+
+
+class QueryHooks:
+    """Callbacks run before and after every query of a `Database`.
+
+    Before hooks are called with a `QueryEvent` that only has the query
+    details filled in, and after hooks are called with the complete event
+    (including any error raised). `span(name)` collects the events of the
+    queries run within it.
+
+    While there are no hooks or open spans, queries aren't traced at all.
+    """
+
+    def __init__(self):
+        self.before = []
+        self.after = []
+        self.span_hooks = []
+
+        self._lock = Lock()
+        self._open_spans = 0
+        self._local = local()
+
+    def __bool__(self):
+        return bool(self.before or self.after or self._open_spans)
+
+    def on_before(self, fn):
+        self.before.append(fn)
+        return fn
+
+    def on_after(self, fn):
+        self.after.append(fn)
+        return fn
+
+    def on_span(self, fn):
+        self.span_hooks.append(fn)
+        return fn
+
+    def remove(self, fn):
+        for hooks in (self.before, self.after, self.span_hooks):
+            while fn in hooks:
+                hooks.remove(fn)
+
+    @contextmanager
+    def span(self, name=None):
+        span = Span(name)
+
+        stack = self._local.__dict__.setdefault("spans", [])
+        stack.append(span)
+
+        with self._lock:
+            self._open_spans += 1
+
+        try:
+            yield span
+        finally:
+            with self._lock:
+                self._open_spans -= 1
+
+            stack.remove(span)
+            span.wall_time = time.perf_counter() - span.started
+
+            for hook in self.span_hooks:
+                hook(span)
+
+    def trace(self, t, kind, query, param_count, run):
+        """Run `run(event)` for transaction `t`, reporting it to the hooks."""
+
+        event = QueryEvent(kind, query, param_count, t.pool_wait)
+        t.pool_wait = 0.0
+
+        for hook in self.before:
+            hook(event)
+
+        try:
+            result = run(event)
+        except BaseException as e:
+            event.finished(error=e)
+            self._report(event)
+            raise
+
+        event.finished(result)
+        self._report(event)
+        return result
+
+    def _report(self, event):
+        for span in self._local.__dict__.get("spans", ()):
+            span.events.append(event)
+
+        for hook in self.after:
+            hook(event)
@@ -1,7 +1,14 @@
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence, Sized
+from itertools import chain, count, islice
 
+from .copying import CopyReader
+from .psyco import reformat_bind_params
 from .rows import Rows
 
+BATCH_ROWS = 10000
+
+staging_table_ids = count(1)
+
 INSERT = """
     insert into
         {table} ({colspec})
@@ -38,52 +45,215 @@ INSERT_UPSERT_DO_NOTHING = """
 """
 
 
+COPY = """
+    copy {table} ({colspec}) from stdin
+"""
+
+
+CREATE_STAGING = """
+    create temporary table {staging}
+    on commit drop
+    as select {colspec} from {table}
+    with no data
+"""
+
+
+INSERT_FROM_STAGING = """
+    insert into
+        {table} ({colspec})
+    select {colspec} from {staging}
+"""
+
+
+def batches(iterable, size):
+    it = iter(iterable)
+
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def rows_with_head(rows):
+    """Normalize `rows` to an iterable of mappings, and peek at the first few.
+
+    Returns the rows, a sequence of the first of them (at least enough to
+    tell whether there's exactly one), and the number of rows if known.
+    """
+
+    if isinstance(rows, Mapping):
+        rows = [rows]
+
+    if isinstance(rows, Rows):
+        rows = rows.as_dicts()
+
+    if isinstance(rows, Sequence):
+        head, rows_count = rows, len(rows)
+    else:
+        # sized but not indexable (eg. dict.values()) still has a length
+        rows_count = len(rows) if isinstance(rows, Sized) else None
+
+        it = iter(rows)
+        head = list(islice(it, 2))
+        rows = chain(head, it)
+
+        if rows_count is None and len(head) < 2:
+            rows_count = len(head)
+
+    if not head:
+        raise ValueError("empty list of rows, nothing to upsert")
+
+    return rows, head, rows_count
+
+
+def values_template(keys):
+    keylist = [f":{_}" for _ in keys]
+    return reformat_bind_params(f"({', '.join(keylist)})")
+
+
+def insert_statement(table, keys, upsert_on=None, returning=False, staging=None):
+    colspec = ", ".join([f'"{k}"' for k in keys])
+
+    if staging:
+        q = INSERT_FROM_STAGING.format(table=table, colspec=colspec, staging=staging)
+    elif keys:
+        valuespec = ", ".join(":{}".format(k) for k in keys)
+        q = INSERT.format(table=table, colspec=colspec, valuespec=valuespec)
+    else:
+        q = INSERT_DEFAULT.format(table=table)
+
+    if upsert_on:
+        upsert_keys = list(keys)
+
+        for k in upsert_on:
+            upsert_keys.remove(k)
+
+        upsertkeyspec = ", ".join([f'"{k}"' for k in upsert_on])
+
+        if upsert_keys:
+            upsertspec = ", ".join(f'"{k}" = excluded."{k}"' for k in upsert_keys)
+
+            q_upsert = INSERT_UPSERT.format(
+                upsertkeyspec=upsertkeyspec, upsertspec=upsertspec
+            )
+        else:
+            q_upsert = INSERT_UPSERT_DO_NOTHING.format(upsertkeyspec=upsertkeyspec)
+
+        q = q + q_upsert
+    if returning:
+        q += " returning *"
+
+    return q
+
+
 class Inserting:
-    def insert(self, table, rows, upsert_on=None, returning=None):
+    def insert(
+        self,
+        table,
+        rows,
+        upsert_on=None,
+        returning=None,
+        method="values",
+        *,
+        page_size=100,
+        batch_rows=BATCH_ROWS,
+        progress=None,
+    ):
+        """Insert `rows` (a mapping, or any iterable of mappings) into `table`.
 
-        if isinstance(rows, Mapping):
-            rows = [rows]
+        Rows are consumed `batch_rows` at a time, so generators of any length
+        can be inserted with flat memory use. `page_size` is the number of
+        rows per `insert` statement within a batch, and `progress` (if given)
+        is called with the running total of rows sent after each batch.
+
+        With `method="copy"`, rows are sent with `COPY` instead, which is much
+        faster for large inserts, but writes values as text without
+        psycopg2's adaptation (so eg. `Json` values and custom adapters don't
+        work), and can't insert into views.
+        """
 
         if isinstance(upsert_on, str):
             upsert_on = [upsert_on]
 
-        if not rows:
-            raise ValueError("empty list of rows, nothing to upsert")
+        rows, head, rows_count = rows_with_head(rows)
 
         if returning is None:
-            returning = not len(rows) > 1
+            returning = rows_count == 1
 
-        if isinstance(rows, Rows):
-            rows = rows.as_dicts()
+        keys = list(head[0].keys())
 
-        keys = list(rows[0].keys())
+        if method not in ("values", "copy"):
+            raise ValueError(f"unknown insert method: {method}")
 
-        if keys:
-            colspec = ", ".join([f'"{k}"' for k in keys])
-            valuespec = ", ".join(":{}".format(k) for k in keys)
-            q = INSERT.format(table=table, colspec=colspec, valuespec=valuespec)
-        else:
-            q = INSERT_DEFAULT.format(table=table)
+        if method == "copy":
+            if not keys:
+                raise ValueError("can't copy rows without any columns")
+
+            if not upsert_on and not returning:
+                self.copy_rows(table, keys, rows, batch_rows, progress)
+                return None
 
-        if upsert_on:
-            upsert_keys = list(keys)
+            conn = self.c.connection
 
-            for k in upsert_on:
-                upsert_keys.remove(k)
+            if conn.autocommit:
+                # the staging table is dropped on commit, so it needs a
+                # transaction to last until the insert from it is done
+                with conn:
+                    return self._insert_staged(
+                        table, keys, rows, upsert_on, returning, batch_rows, progress
+                    )
 
-            upsertkeyspec = ", ".join([f'"{k}"' for k in upsert_on])
+            return self._insert_staged(
+                table, keys, rows, upsert_on, returning, batch_rows, progress
+            )
 
-            if upsert_keys:
-                upsertspec = ", ".join(f'"{k}" = excluded."{k}"' for k in upsert_keys)
+        q = insert_statement(table, keys, upsert_on, returning)
 
-                q_upsert = INSERT_UPSERT.format(
-                    upsertkeyspec=upsertkeyspec, upsertspec=upsertspec
-                )
-            else:
-                q_upsert = INSERT_UPSERT_DO_NOTHING.format(upsertkeyspec=upsertkeyspec)
+        inserted = None
+        sent = 0
+
+        for batch in batches(rows, batch_rows):
+            fetched = self.qvalues(q, batch, fetch=bool(returning), page_size=page_size)
+
+            if inserted is None:
+                inserted = fetched
+            elif fetched:
+                inserted.extend(fetched)
+
+            sent += len(batch)
+
+            if progress:
+                progress(sent)
+
+        return inserted
+
+    def _insert_staged(
+        self, table, keys, rows, upsert_on, returning, batch_rows, progress
+    ):
+        staging = f"databaseci_staging_{next(staging_table_ids)}"
+        colspec = ", ".join([f'"{k}"' for k in keys])
+
+        self.ex(CREATE_STAGING.format(staging=staging, colspec=colspec, table=table))
+        self.copy_rows(staging, keys, rows, batch_rows, progress)
+
+        q = insert_statement(table, keys, upsert_on, returning, staging=staging)
+        return self.execute(q)
+
+    def copy_rows(self, table, keys, rows, batch_rows=BATCH_ROWS, progress=None):
+        colspec = ", ".join([f'"{k}"' for k in keys])
+        copy = COPY.format(table=table, colspec=colspec)
+
+        reader = CopyReader(rows, keys, progress=progress, progress_every=batch_rows)
+
+        if self.hooks is not None:
+
+            def run(event):
+                self.c.copy_expert(copy, reader)
+                event.rows = reader.count
+
+            self.hooks.trace(self, "copy", copy, 0, run)
+        else:
+            self.c.copy_expert(copy, reader)
 
-            q = q + q_upsert
-        if returning:
-            q += " returning *"
+        if progress and reader.count % batch_rows:
+            progress(reader.count)
 
-        return self.qvalues(q, rows, fetch=bool(returning))
+        return reader.count
@@ -1,7 +1,7 @@
 import csv
 from io import StringIO as sio
 
-from .curs import DictRow
+from .curs import row_class
 from .rows import Rows
 
 
@@ -13,7 +13,9 @@ def rows_from_text(t, format="csv", **kwargs):
 
     index = {k: i for i, k in enumerate(column_names)}
 
-    rows = Rows(DictRow(index=index, items=row) for row in r)
+    cls = row_class(tuple(index.items()))
+
+    rows = Rows(cls(items=row) for row in r)
 
     rows.column_info = {k: "text" for k in column_names}
 
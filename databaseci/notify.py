@@ -46,7 +46,12 @@ def log_notification(_n):
 
 class ListenNotify:
     def notifications(
-        self, connection, timeout=5, yield_on_timeout=False, handle_signals=None
+        self,
+        connection,
+        timeout=5,
+        yield_on_timeout=False,
+        handle_signals=None,
+        interrupt_fd=None,
     ):
         """Subscribe to PostgreSQL notifications, and handle them
         in infinite-loop style.
@@ -55,6 +60,9 @@ class ListenNotify:
         .channel, and .payload attributes).
 
         If you've enabled 'yield_on_timeout', yields None on timeout.
+
+        If 'interrupt_fd' is given, writing to it (from another thread, say)
+        wakes the loop, which yields None.
         """
 
         cc = connection
@@ -74,6 +82,9 @@ class ListenNotify:
                 listen_on = [cc]
                 wakeup = None
 
+            if interrupt_fd is not None:
+                listen_on.append(interrupt_fd)
+
             while True:
                 try:
                     if timeout_is_callable:
@@ -100,6 +111,10 @@ class ListenNotify:
                         log.info(f"woken from slumber by signal: {signal_name}")
                         yield signal_int
 
+                    if interrupt_fd is not None and interrupt_fd in r:
+                        os.read(interrupt_fd, 4096)
+                        yield None
+
                     if cc in r:
                         cc.poll()
 
@@ -2,8 +2,11 @@
 
 import csv
 import io
+import math
+import re
 from itertools import zip_longest
 
+from .explain import Plan, explain_query
 from .rows import Rows
 
 sio = io.StringIO
@@ -64,17 +67,202 @@ select * from
 PARAM_PREFIX = "paging_"
 
 
+INLINED_QUERY = """
+{select}
+{bookmark}
+{order_by}
+{limit}
+"""
+
+PAGING_MODES = ("wrap", "inline")
+
+QUOTED = re.compile(r"'(?:[^']|'')*'" + r'|"(?:[^"]|"")*"')
+
+# anything that could change which rows a predicate, order by and limit
+# added to the query apply to (or that the simple parsing below could get
+# wrong), so that the query has to be wrapped instead
+NOT_INLINABLE = re.compile(
+    r"""
+    --|/\*|\$|(?<![\w$])e'|;
+    | \b(?:distinct\s+on|group|having|window|over|union|intersect|except
+    | limit|offset|fetch|order|join|lateral|for|with|tablesample)\b
+    """,
+    re.X | re.I | re.S,
+)
+
+SIMPLE_SELECT = re.compile(
+    r"""
+    \s*select\s+(?:distinct\s+)?(?P<columns>.+?)
+    \s+from\s+[\w."]+
+    (?:\s+(?:as\s+)?(?!where\b)[\w"]+)?
+    (?:\s+where\s+(?P<where>.+?))?
+    \s*$
+    """,
+    re.X | re.I | re.S,
+)
+
+SELECT = re.compile(r"\bselect\b", re.I)
+
+PLAIN_COLUMN = re.compile(r'(?:[\w"]+\.)?(?P<name>\*|[\w"]+)')
+
+
+def masked_query(query):
+    # quoted strings and identifiers emptied out (keeping their length), so
+    # that what's inside them can't be mistaken for keywords
+    return QUOTED.sub(lambda m: m.group()[0] * len(m.group()), query)
+
+
+def inlinable_parts(query, order_by):
+    """The select list and from clause, and the where condition (if any), of
+    `query`, if it's a plain select from a single table (optionally with
+    `distinct`) that returns the `order_by` columns unchanged. Otherwise
+    None."""
+
+    query = query.strip().rstrip(";").rstrip()
+    masked = masked_query(query)
+
+    if NOT_INLINABLE.search(masked) or len(SELECT.findall(masked)) > 1:
+        return None
+
+    m = SIMPLE_SELECT.match(masked)
+
+    if not m:
+        return None
+
+    columns = query[m.start("columns") : m.end("columns")].split(",")
+    names = set()
+
+    for column in columns:
+        plain = PLAIN_COLUMN.fullmatch(column.strip())
+
+        if not plain:
+            return None
+        names.add(plain.group("name").strip('"').lower())
+
+    if "*" not in names:
+        for name, _ in parse_order_by(order_by):
+            if name.lower() not in names:
+                return None
+
+    if m.group("where") is None:
+        return query, None
+
+    where_start, where_end = m.span("where")
+    select = query[: m.start("where")].rstrip()
+    select = select[: -len("where")]
+    return select, query[where_start:where_end]
+
+
 def get_paged_query(
-    query, params, order_by, bookmark=None, per_page=10, backwards=False
+    query,
+    params,
+    order_by,
+    bookmark=None,
+    per_page=10,
+    backwards=False,
+    mode="wrap",
 ):
-    query, paging_query_params = paging_wrapped_query(
-        query, order_by, bookmark, per_page, backwards
-    )
+    if mode not in PAGING_MODES:
+        raise ValueError(f"paging mode must be wrap or inline, not {mode!r}")
+
+    paged = None
+
+    if mode == "inline":
+        paged = paging_inlined_query(query, order_by, bookmark, per_page, backwards)
+
+    if paged is None:
+        paged = paging_wrapped_query(query, order_by, bookmark, per_page, backwards)
+
+    query, paging_query_params = paged
     params.update(paging_query_params)
 
     return query, params
 
 
+# how long a total count of a paged query is cached for, by default
+DEFAULT_COUNT_TTL = 60.0
+
+COUNT_QUERY = """
+select count(*) from
+(
+{q}
+) counted_table
+"""
+
+CAPPED_COUNT_QUERY = """
+select count(*) from
+(
+select 1 from
+(
+{q}
+) counted_table
+limit {cap}
+) capped_table
+"""
+
+
+def parse_count(count):
+    if count in ("estimate", "exact"):
+        return count, None
+
+    if isinstance(count, str) and count.startswith("capped:"):
+        cap = count[len("capped:") :]
+
+        if cap.isdigit() and int(cap) > 0:
+            return "capped", int(cap)
+
+    raise ValueError(f'count must be "estimate", "exact" or "capped:N", not {count!r}')
+
+
+def split_count_options(paging):
+    """The paging options without `count` and `count_ttl`, and those two."""
+
+    paging = dict(paging)
+    count = paging.pop("count", None)
+    count_ttl = paging.pop("count_ttl", DEFAULT_COUNT_TTL)
+
+    if count is not None:
+        parse_count(count)
+
+    return paging, count, count_ttl
+
+
+def get_count_query(query, count):
+    mode, cap = parse_count(count)
+
+    if mode == "estimate":
+        return explain_query(query, "plan")
+
+    if mode == "capped":
+        return CAPPED_COUNT_QUERY.format(q=query, cap=cap)
+
+    return COUNT_QUERY.format(q=query)
+
+
+def get_count_result(rows, count):
+    mode, _ = parse_count(count)
+    value = rows[0][0]
+
+    if mode == "estimate":
+        return round(Plan(value).plan_rows)
+
+    return value
+
+
+def paging_cache_key(paging):
+    """The options of `paging` that determine which page is returned."""
+
+    bookmark = paging.get("bookmark")
+
+    return (
+        paging["order_by"],
+        paging.get("per_page", 10),
+        None if bookmark is None else tuple(bookmark),
+        bool(paging.get("backwards")),
+        paging.get("count"),
+    )
+
+
 def get_paged_rows(rows, paging_params):
     rows.paging = Paging(rows, **paging_params)
     return rows
@@ -146,7 +334,7 @@ def paging_params(cols, bookmark):
     return dict(zip_longest(names, bookmark or []))
 
 
-def paging_wrapped_query(query, order_by, bookmark, per_page, backwards):
+def paging_clauses(order_by, bookmark, per_page, backwards):
     cols = parse_order_by(order_by)
     if backwards:
         cols = reversed_order_by(cols)
@@ -158,21 +346,67 @@ def paging_wrapped_query(query, order_by, bookmark, per_page, backwards):
     limit = f"limit {per_page + 1}"
 
     params = paging_params(cols, bookmark)
+    return bookmark_clause, order_by, limit, params
+
+
+def paging_wrapped_query(query, order_by, bookmark, per_page, backwards):
+    bookmark_clause, order_by, limit, params = paging_clauses(
+        order_by, bookmark, per_page, backwards
+    )
+
     formatted = PAGED_QUERY.format(
         q=query, bookmark=bookmark_clause, order_by=order_by, limit=limit
     )
     return formatted, params
 
 
+def paging_inlined_query(query, order_by, bookmark, per_page, backwards):
+    """As `paging_wrapped_query`, but with the bookmark condition, order by
+    and limit added to `query` itself, which the planner can sometimes do
+    better with. Returns None if `query` isn't simple enough for that (see
+    `inlinable_parts`)."""
+
+    parts = inlinable_parts(query, order_by)
+
+    if parts is None:
+        return None
+
+    select, where = parts
+
+    bookmark_clause, order_by, limit, params = paging_clauses(
+        order_by, bookmark, per_page, backwards
+    )
+
+    if where is not None:
+        if bookmark_clause:
+            condition = bookmark_clause[len("where ") :]
+            bookmark_clause = f"where (\n{where}\n) and {condition}"
+        else:
+            bookmark_clause = f"where {where}"
+
+    formatted = INLINED_QUERY.format(
+        select=select, bookmark=bookmark_clause, order_by=order_by, limit=limit
+    )
+    return formatted, params
+
+
 class Paging:
     def __init__(
-        self, results, *, order_by, per_page=10, bookmark=None, backwards=False
+        self,
+        results,
+        *,
+        order_by,
+        per_page=10,
+        bookmark=None,
+        backwards=False,
+        mode="wrap",
     ):
         self.results = results
         self.per_page = per_page
         self.order_by = order_by
         self.bookmark = bookmark
         self.backwards = backwards
+        self.mode = mode
         self.parsed_order_by = parse_order_by(order_by)
         self.order_keys = [c[0] for c in self.parsed_order_by]
         # self.d = d
@@ -188,6 +422,10 @@ class Paging:
             results.reverse()
         self.count = len(self.results)
 
+        self.total = None
+        self.total_is_estimate = False
+        self.total_is_capped = False
+
         if self.count:
             self.names = list(self.results[0].keys())
             self.names_i = {n: i for i, n in enumerate(self.names)}
@@ -264,5 +502,26 @@ class Paging:
         if self.discarded_item:
             return self.get_bookmark(self.discarded_item)
 
+    def set_total(self, total, count):
+        """Record the `total` rows of the unpaged query, from a `count` of
+        "estimate", "exact" or "capped:N". If every row is on this page,
+        `total` isn't needed (and can be None), as the page's own count is
+        used."""
+
+        mode, cap = parse_count(count)
+
+        if self.is_all:
+            # every row is on this page, so the total is known exactly
+            total, mode = self.count, "exact"
+
+        self.total = total
+        self.total_is_estimate = mode == "estimate"
+        self.total_is_capped = mode == "capped" and total >= cap
+
+    @property
+    def page_count(self):
+        if self.total is not None:
+            return math.ceil(self.total / self.per_page)
+
     def get_bookmark(self, result_row):
         return tuple(result_row[self.names_i[k]] for k in self.order_keys)
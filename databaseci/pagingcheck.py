@@ -0,0 +1,223 @@
+import os
+import warnings
+from collections import OrderedDict
+from inspect import currentframe
+from threading import Lock
+
+from .paging import parse_order_by, quoted
+from .schemas import get_inspected
+
+ON_FULL_SORT = ("warn", "raise", "ignore")
+
+# nodes between the limit of a paged query and the sort for its order by,
+# if there is one
+PASS_THROUGH_NODES = ("Limit", "Gather Merge", "Result", "Subquery Scan")
+
+CHECKED_PAGING_CACHE_SIZE = 1024
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+class PagingSortWarning(UserWarning):
+    pass
+
+
+class PagingSortError(ValueError):
+    pass
+
+
+def caller_stacklevel():
+    # the `warnings.warn` stacklevel, for a warning issued by the caller of
+    # this function, of the first frame outside this package, so that the
+    # warning points at the code that ran the query
+    frame = currentframe().f_back
+    level = 1
+
+    while frame.f_back and frame.f_code.co_filename.startswith(PACKAGE_DIR):
+        frame = frame.f_back
+        level += 1
+    return level
+
+
+def outer_sort(plan):
+    """The Sort node of `plan` that sorts every row for the paged query's
+    `order by`, if any. An index scan in order (or an Incremental Sort,
+    which only sorts within groups of rows already in order) has none."""
+
+    node = plan.root
+
+    while node.node_type in PASS_THROUGH_NODES and len(node.children) == 1:
+        node = node.children[0]
+
+    if node.node_type == "Sort":
+        return node
+
+
+def scanned_relations(node):
+    return {_.relation for _ in node.walk() if _.relation}
+
+
+def index_directions(index):
+    # bit 0 of each of pg_index.indoption is set for descending columns
+    options = (index.key_options or "").split()
+    return [bool(int(_) & 1) for _ in options]
+
+
+def supporting_index(indexes, table, cols):
+    """The name of an index on `table` that can be scanned (forwards or
+    backwards) in the order of `cols`, if there is one."""
+
+    names = [name for name, _ in cols]
+    wanted = [descending for _, descending in cols]
+    flipped = [not _ for _ in wanted]
+
+    for index in indexes.values():
+        if index.table_name != table or index.partial_predicate:
+            continue
+
+        if index.algorithm != "btree" or index.key_columns[: len(names)] != names:
+            continue
+
+        directions = index_directions(index)[: len(names)]
+
+        if directions in (wanted, flipped):
+            return index.name
+
+
+def suggested_index(table, cols):
+    if all(descending for _, descending in cols):
+        # an ascending index scanned backwards is just as good
+        cols = [(name, False) for name, _ in cols]
+
+    columns = ", ".join(
+        quoted(name) + (" desc" if descending else "") for name, descending in cols
+    )
+    return f"create index on {table} ({columns});"
+
+
+class PagingCheck:
+    """Whether a paged query can be read in `order_by` order from an index,
+    rather than sorting every row of the query to return each page."""
+
+    def __init__(self, query, order_by, plan, sort, table=None, index=None):
+        self.query = query
+        self.order_by = order_by
+        self.plan = plan
+        self.sort = sort
+        self.table = table
+        self.index = index
+        self.suggested_index = None
+
+    @property
+    def full_sort(self):
+        return self.sort is not None
+
+    @property
+    def ok(self):
+        # an existing index that the planner passes over (eg. because the
+        # table is tiny) isn't a problem with the query
+        return not self.full_sort or self.index is not None
+
+    @property
+    def message(self):
+        if not self.full_sort:
+            return f"paging by {self.order_by} uses the order of an index"
+
+        if self.index:
+            return (
+                f"paging by {self.order_by} sorts the whole query, although "
+                f"index {self.index} could be used"
+            )
+
+        message = f"paging by {self.order_by} sorts the whole query on every page"
+
+        if self.suggested_index:
+            message += f", an index would avoid this: {self.suggested_index}"
+        return message
+
+    def report(self, on_full_sort="warn"):
+        if on_full_sort not in ON_FULL_SORT:
+            raise ValueError(
+                f"on_full_sort must be one of {', '.join(ON_FULL_SORT)}, "
+                f"not {on_full_sort!r}"
+            )
+
+        if self.ok or on_full_sort == "ignore":
+            return
+
+        if on_full_sort == "raise":
+            raise PagingSortError(self.message)
+
+        warnings.warn(self.message, PagingSortWarning, stacklevel=caller_stacklevel())
+
+    def __repr__(self):
+        return f"PagingCheck({self.order_by!r}, ok={self.ok})"
+
+
+def paging_check(t, query, order_by, params=None, mode="wrap"):
+    """Check whether paging `query` by `order_by` (in transaction `t`) needs
+    a full sort, suggesting an index to avoid it where the query reads from
+    a single table.
+    """
+
+    cols = parse_order_by(order_by)
+    cols = [(name.lower(), descending) for name, descending in cols]
+
+    paging = dict(order_by=order_by, mode=mode)
+    plan = t.q(query, params, paging=paging, explain="plan")
+    sort = outer_sort(plan)
+
+    check = PagingCheck(query, order_by, plan, sort)
+
+    if sort is None:
+        return check
+
+    relations = scanned_relations(sort)
+
+    if len(relations) != 1:
+        return check
+
+    (table,) = relations
+    i = get_inspected(t)
+
+    check.table = table
+    check.index = supporting_index(i.indexes, table, cols)
+
+    candidates = [_ for _ in i.tables.values() if _.name == table]
+
+    if len(candidates) == 1:
+        table = candidates[0]
+
+        if all(name in table.columns for name, _ in cols):
+            check.suggested_index = suggested_index(table.quoted_full_name, cols)
+
+    return check
+
+
+_checked = OrderedDict()
+_checked_lock = Lock()
+
+
+def checked_paging(t, query, paging, params=None):
+    """As `paging_check` (with the options of `paging`), but only checking
+    each query once per process (for the most recent
+    `CHECKED_PAGING_CACHE_SIZE` queries)."""
+
+    order_by, mode = paging["order_by"], paging.get("mode", "wrap")
+    key = t.c.connection.dsn, query, order_by, mode
+
+    with _checked_lock:
+        if key in _checked:
+            _checked.move_to_end(key)
+            return _checked[key]
+
+    # checked without the lock held, so a concurrent first check of the same
+    # query just runs twice
+    check = paging_check(t, query, order_by, params, mode)
+
+    with _checked_lock:
+        _checked[key] = check
+
+        while len(_checked) > CHECKED_PAGING_CACHE_SIZE:
+            _checked.popitem(last=False)
+    return check
@@ -0,0 +1,140 @@
+import time
+from statistics import median
+
+from .utils import yaml_from_file
+
+DEFAULT_THRESHOLD = 0.2
+
+
+def load_queries(path):
+    """Named queries from a YAML file, as a list of (name, sql, params).
+
+    The file maps names to either the SQL of a query, or to a mapping with
+    `sql` and (optionally) `params` keys:
+
+        active_users:
+          sql: select * from users where active = :active
+          params: {active: true}
+        order_count: select count(*) from orders
+    """
+
+    loaded = yaml_from_file(path) or {}
+
+    if "queries" in loaded and isinstance(loaded["queries"], dict):
+        loaded = loaded["queries"]
+
+    queries = []
+
+    for name, spec in loaded.items():
+        if isinstance(spec, str):
+            sql, params = spec, {}
+        else:
+            sql, params = spec["sql"], spec.get("params") or {}
+
+        queries.append((name, sql, params))
+
+    return queries
+
+
+def timed_runs(t, sql, params, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        t.q(sql, params)
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def measure(db, sql, params, repeat=0):
+    # read-only connections, so that nothing in the file can change the data
+    with db.t_read() as t:
+        plan = t.q(sql, params, explain="plan")
+        timings = timed_runs(t, sql, params, repeat)
+
+    return plan, median(timings) if timings else None
+
+
+def increase(a, b):
+    if a is None or b is None:
+        return None
+
+    if not a:
+        return None if not b else float("inf")
+    return (b - a) / a
+
+
+class QueryComparison:
+    """The plans (and, optionally, timings) of one query on two databases."""
+
+    def __init__(self, name, plan_a, plan_b, time_a=None, time_b=None):
+        self.name = name
+        self.plan_a = plan_a
+        self.plan_b = plan_b
+        self.time_a = time_a
+        self.time_b = time_b
+
+    @property
+    def shape_changed(self):
+        return self.plan_a.shape != self.plan_b.shape
+
+    @property
+    def cost_increase(self):
+        return increase(self.plan_a.total_cost, self.plan_b.total_cost)
+
+    @property
+    def time_increase(self):
+        return increase(self.time_a, self.time_b)
+
+    def regressions(self, threshold=DEFAULT_THRESHOLD):
+        found = []
+
+        for label, change in (
+            ("cost", self.cost_increase),
+            ("time", self.time_increase),
+        ):
+            if change is not None and change > threshold:
+                found.append(f"{label} up {change:.0%}")
+
+        return found
+
+    def report(self, threshold=DEFAULT_THRESHOLD):
+        lines = [f"{self.name}:"]
+
+        cost = f"  cost: {self.plan_a.total_cost} -> {self.plan_b.total_cost}"
+        lines.append(cost)
+
+        if self.time_a is not None:
+            lines.append(
+                f"  time: {self.time_a * 1000:.3f}ms -> {self.time_b * 1000:.3f}ms"
+            )
+
+        if self.shape_changed:
+            lines.append("  plan changed, from:")
+            lines.extend("    " + _ for _ in str(self.plan_a).splitlines())
+            lines.append("  to:")
+            lines.extend("    " + _ for _ in str(self.plan_b).splitlines())
+
+        for regression in self.regressions(threshold):
+            lines.append(f"  REGRESSION: {regression}")
+
+        return "\n".join(lines)
+
+
+def perfdiff(db_a, db_b, queries, repeat=0):
+    """Compare each of `queries` (name, sql, params) between `db_a` and `db_b`.
+
+    Plans come from `EXPLAIN`, and if `repeat` is nonzero, each query is also
+    run that many times on each database, and the median times compared.
+    """
+
+    comparisons = []
+
+    for name, sql, params in queries:
+        plan_a, time_a = measure(db_a, sql, params, repeat)
+        plan_b, time_b = measure(db_b, sql, params, repeat)
+
+        comparisons.append(QueryComparison(name, plan_a, plan_b, time_a, time_b))
+
+    return comparisons
@@ -0,0 +1,396 @@
+import time
+from collections import deque
+from threading import Condition
+
+from psycopg2 import connect as pgconnect
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+from .curs import DictCursor
+from .prepared import PreparedStatements
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class PoolBase:
+    """The bookkeeping shared by `ConnectionPool` and `AsyncConnectionPool`:
+    which connections are idle and since when, how old each is, and checkout
+    statistics. Subclasses do the locking, and provide `_notify` to wake a
+    waiting `getconn`. Unless noted, methods must be called with the lock
+    held.
+    """
+
+    def __init__(
+        self, url, *, minconn, maxconn, timeout, max_idle, max_lifetime, check_after
+    ):
+        if minconn > maxconn:
+            raise ValueError("minconn cannot be greater than maxconn")
+
+        self.url = url
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+        self._failed_checks = 0
+
+    def _opened_connection(self, conn):
+        self._created_at[conn] = time.monotonic()
+        self._opened += 1
+
+    def _discard(self, conn):
+        self._created_at.pop(conn, None)
+        self._size -= 1
+        self._discarded += 1
+
+        if not conn.closed:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+        self._notify()
+
+    def _expired(self, conn, now):
+        created = self._created_at.get(conn, now)
+        return self.max_lifetime is not None and now - created > self.max_lifetime
+
+    def _evict_idle(self, now):
+        if self.max_idle is None:
+            return
+
+        while self._idle and self._size > self.minconn:
+            conn, idle_since = self._idle[0]
+
+            if now - idle_since <= self.max_idle:
+                break
+
+            self._idle.popleft()
+            self._discard(conn)
+
+    def _needs_check(self, idle_time):
+        return self.check_after is not None and idle_time >= self.check_after
+
+    def _checkout_idle(self, now):
+        """The most recently used idle connection that's still open and not
+        expired, and the time it went idle, or None."""
+
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+
+        self._evict_idle(now)
+
+        while self._idle:
+            conn, idle_since = self._idle.pop()
+
+            if conn.closed or self._expired(conn, now):
+                self._discard(conn)
+                continue
+            return conn, idle_since
+
+    def _reserve(self):
+        """Claim room for a new connection, if there is any."""
+
+        if self._size < self.maxconn:
+            self._size += 1
+            return True
+        return False
+
+    def _unreserve(self):
+        self._size -= 1
+        self._notify()
+
+    def _remaining(self, timeout, start, now):
+        """How much longer to wait for a connection, raising `PoolTimeout`
+        once there's no time left."""
+
+        remaining = None if timeout is None else timeout - (now - start)
+
+        if remaining is not None and remaining <= 0:
+            self._timeouts += 1
+            raise PoolTimeout(
+                f"timed out after {timeout}s waiting for a connection "
+                f"(all {self.maxconn} connections in use)"
+            )
+        return remaining
+
+    def _record_checkout(self, start, waited):
+        wait_time = time.monotonic() - start
+
+        self._checkouts += 1
+
+        if waited:
+            self._waits += 1
+        self._wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+
+    def _release(self, conn, close):
+        now = time.monotonic()
+
+        if close or conn.closed or self._closed or self._expired(conn, now):
+            self._discard(conn)
+        else:
+            self._idle.append((conn, now))
+            self._notify()
+
+        self._evict_idle(now)
+
+    def _close_all(self):
+        self._closed = True
+
+        while self._idle:
+            conn, _ = self._idle.pop()
+            self._discard(conn)
+
+    def _stats(self):
+        idle = len(self._idle)
+
+        return dict(
+            size=self._size,
+            in_use=self._size - idle,
+            idle=idle,
+            waiting=self._waiting,
+            minconn=self.minconn,
+            maxconn=self.maxconn,
+            checkouts=self._checkouts,
+            waits=self._waits,
+            timeouts=self._timeouts,
+            total_wait_time=self._wait_time,
+            max_wait_time=self._max_wait_time,
+            mean_wait_time=self._wait_time / (self._checkouts or 1),
+            connections_opened=self._opened,
+            connections_closed=self._discarded,
+            failed_checks=self._failed_checks,
+        )
+
+
+class ConnectionPool(PoolBase):
+    """A bounded, thread-safe pool of connections to a single database.
+
+    Connections are handed out most-recently-used first, so that surplus
+    connections sit idle at the other end of the queue and are closed once
+    they've been idle for longer than `max_idle` seconds (never dropping below
+    `minconn`). Connections older than `max_lifetime` seconds are closed
+    rather than reused, and connections that have been idle for more than
+    `check_after` seconds are pinged before being handed out. When all
+    `maxconn` connections are in use, `getconn` blocks for up to `timeout`
+    seconds before raising `PoolTimeout`.
+
+    With `readonly=True`, connections are opened as read-only autocommit
+    sessions, and `cursor(conn)` hands out one long-lived cursor per
+    connection, for running single statements without any transaction
+    overhead.
+
+    If `prepared_statements` is nonzero, each connection gets an LRU cache of
+    up to that many server-side prepared statements, which is dropped along
+    with the connection.
+    """
+
+    def __init__(
+        self,
+        url,
+        *,
+        minconn=1,
+        maxconn=10,
+        timeout=30.0,
+        max_idle=300.0,
+        max_lifetime=3600.0,
+        check_after=1.0,
+        autocommit=False,
+        readonly=False,
+        prepared_statements=0,
+    ):
+        super().__init__(
+            url,
+            minconn=minconn,
+            maxconn=maxconn,
+            timeout=timeout,
+            max_idle=max_idle,
+            max_lifetime=max_lifetime,
+            check_after=check_after,
+        )
+        self.autocommit = autocommit or readonly
+        self.readonly = readonly
+        self.prepared_statements = prepared_statements
+
+        self._cond = Condition()
+        self._statement_caches = {}
+        self._cursors = {}
+        self._retired_statement_stats = dict(
+            hits=0, misses=0, evictions=0, failures=0, invalidations=0
+        )
+
+        for _ in range(minconn):
+            self._size += 1
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        try:
+            conn = pgconnect(self.url)
+        except Exception:
+            with self._cond:
+                self._unreserve()
+            raise
+
+        if self.readonly:
+            conn.set_session(readonly=True, autocommit=True)
+        elif self.autocommit:
+            conn.autocommit = True
+
+        with self._cond:
+            self._opened_connection(conn)
+        return conn
+
+    def _notify(self):
+        self._cond.notify()
+
+    def _discard(self, conn):
+        # caller must hold self._cond
+        self._retire_statement_cache(conn)
+        self._cursors.pop(conn, None)
+        super()._discard(conn)
+
+    def cursor(self, conn):
+        """The reusable `DictCursor` for `conn`, created on first use."""
+
+        with self._cond:
+            try:
+                return self._cursors[conn]
+            except KeyError:
+                cursor = conn.cursor(cursor_factory=DictCursor)
+                self._cursors[conn] = cursor
+                return cursor
+
+    def statement_cache(self, conn):
+        if not self.prepared_statements:
+            return None
+
+        with self._cond:
+            try:
+                return self._statement_caches[conn]
+            except KeyError:
+                cache = PreparedStatements(conn, self.prepared_statements)
+                self._statement_caches[conn] = cache
+                return cache
+
+    def _retire_statement_cache(self, conn):
+        # caller must hold self._cond
+        cache = self._statement_caches.pop(conn, None)
+
+        if cache is not None:
+            retired = self._retired_statement_stats
+
+            for k in retired:
+                retired[k] += cache.stats()[k]
+
+    def statement_stats(self):
+        with self._cond:
+            totals = dict(self._retired_statement_stats)
+            totals["size"] = 0
+
+            for cache in self._statement_caches.values():
+                for k, v in cache.stats().items():
+                    totals[k] += v
+
+            return totals
+
+    def _healthy(self, conn, idle_time):
+        if conn.closed:
+            return False
+
+        if not self._needs_check(idle_time):
+            return True
+
+        try:
+            with conn.cursor() as c:
+                c.execute("select 1")
+
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+
+        start = time.monotonic()
+        waited = False
+
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    idle = self._checkout_idle(now)
+
+                    if idle is not None:
+                        conn, idle_since = idle
+                        break
+
+                    if self._reserve():
+                        conn = None
+                        break
+
+                    remaining = self._remaining(timeout, start, now)
+
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if conn is None:
+                conn = self._connect()
+            elif not self._healthy(conn, time.monotonic() - idle_since):
+                with self._cond:
+                    self._failed_checks += 1
+                    self._discard(conn)
+                continue
+
+            with self._cond:
+                self._record_checkout(start, waited)
+
+            return conn
+
+    def putconn(self, conn, close=False):
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    close = True
+
+        with self._cond:
+            self._release(conn, close)
+
+    def closeall(self):
+        with self._cond:
+            self._close_all()
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            prepared = {f"prepared_{k}": v for k, v in self.statement_stats().items()}
+            return dict(self._stats(), **prepared)
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from itertools import count
+
+from psycopg2 import Error as PsycopgError
+from psycopg2.errorcodes import FEATURE_NOT_SUPPORTED, INVALID_SQL_STATEMENT_NAME
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR
+
+# shared, so that statements left on a connection by one set of prepared
+# statements can't clash with the names of another
+statement_ids = count(1)
+
+
+class PreparedStatements:
+    """An LRU cache of server-side prepared statements for one connection.
+
+    Statements are keyed by the compiled query text. The least recently used
+    statement is `DEALLOCATE`d once there are more than `maxsize` of them.
+    Queries that fail to prepare (for instance, because a parameter's type
+    can't be inferred) are remembered and run unprepared from then on.
+
+    A statement whose result columns have changed since it was prepared (eg.
+    `select *` after a column is added) fails with "cached plan must not
+    change result type". It's dropped from the cache, and the query run
+    unprepared instead, unless that error aborted a transaction that had
+    already run other statements. Then the error is raised, and the query is
+    prepared again the next time it runs.
+
+    Note that parameters of prepared statements are typed by the server when
+    the statement is prepared, rather than from the Python values passed in,
+    so an otherwise untyped parameter (eg. `select :x`) comes back as text.
+    """
+
+    def __init__(self, conn, maxsize):
+        self.conn = conn
+        self.maxsize = maxsize
+        self.statements = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0
+        self.invalidations = 0
+        self._stale = []
+
+    def stats(self):
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            failures=self.failures,
+            invalidations=self.invalidations,
+            size=len(self.statements),
+        )
+
+    def _try(self, cursor, statement):
+        """Run `statement`, returning whether it succeeded, without its
+        failure aborting the transaction."""
+
+        if self.conn.autocommit:
+            try:
+                cursor.execute(statement)
+            except PsycopgError:
+                return False
+            return True
+
+        try:
+            cursor.execute(
+                f"savepoint databaseci_prepare; {statement}; "
+                "release savepoint databaseci_prepare"
+            )
+        except PsycopgError:
+            cursor.execute(
+                "rollback to savepoint databaseci_prepare; "
+                "release savepoint databaseci_prepare"
+            )
+            return False
+        return True
+
+    def _prepare(self, cursor, text):
+        name = f"databaseci_{next(statement_ids)}"
+
+        if self._try(cursor, f"prepare {name} as {text}"):
+            return name
+        return None
+
+    def _deallocate_stale(self, cursor):
+        if self.conn.info.transaction_status == TRANSACTION_STATUS_INERROR:
+            return
+
+        while self._stale:
+            self._try(cursor, f"deallocate {self._stale.pop()}")
+
+    def _invalidate(self, key, error):
+        name, _ = self.statements.pop(key)
+        self.invalidations += 1
+
+        if error.pgcode != INVALID_SQL_STATEMENT_NAME:
+            self._stale.append(name)
+
+    def clear(self, cursor):
+        for entry in self.statements.values():
+            if entry is not None:
+                name, _ = entry
+                cursor.execute(f"deallocate {name}")
+
+        self.statements.clear()
+
+    def _evict(self, cursor):
+        while len(self.statements) > self.maxsize:
+            _, entry = self.statements.popitem(last=False)
+
+            if entry is not None:
+                name, _ = entry
+                cursor.execute(f"deallocate {name}")
+                self.evictions += 1
+
+    def execute(self, cursor, compiled, params):
+        """Run `compiled` as a prepared statement, preparing it if necessary.
+
+        Returns False, having done nothing, if the query can't be prepared.
+        """
+
+        if compiled.prepared is None:
+            return False
+
+        key = compiled.text
+        self._deallocate_stale(cursor)
+
+        try:
+            entry = self.statements[key]
+            self.statements.move_to_end(key)
+
+            if entry is None:
+                return False
+            hit = True
+
+        except KeyError:
+            self.misses += 1
+            hit = False
+
+            text, names = compiled.prepared
+            name = self._prepare(cursor, text)
+
+            if name is None:
+                self.failures += 1
+                entry = None
+            elif names:
+                placeholders = ", ".join(f"%({_})s" for _ in names)
+                entry = name, f"execute {name} ({placeholders})"
+            else:
+                entry = name, f"execute {name}"
+
+            self.statements[key] = entry
+            self._evict(cursor)
+
+            if entry is None:
+                return False
+
+        _, execute_sql = entry
+        status = self.conn.info.transaction_status
+
+        try:
+            cursor.execute(execute_sql, params)
+        except PsycopgError as e:
+            if not hit or not is_stale_statement_error(e):
+                raise
+
+            self._invalidate(key, e)
+
+            if not self.conn.autocommit:
+                if status != TRANSACTION_STATUS_IDLE:
+                    raise
+
+                # the failed statement was the first of the transaction, so
+                # starting it again loses nothing
+                self.conn.rollback()
+
+            self._deallocate_stale(cursor)
+            return False
+
+        if hit:
+            self.hits += 1
+        return True
+
+
+def is_stale_statement_error(e):
+    if e.pgcode == INVALID_SQL_STATEMENT_NAME:
+        return True
+
+    return e.pgcode == FEATURE_NOT_SUPPORTED and "cached plan" in str(e)
@@ -1,31 +1,239 @@
 import re
 import string
+from functools import lru_cache
 
 safe_chars = {k: None for k in (string.ascii_lowercase + "_")}
 
+COMPILED_QUERY_CACHE_SIZE = 1024
 
-def reformat_bind_params(q, rewrite=True):
-    x = re.compile(r"[^:](:[a-z0-9_]+)")
+TOKENS = re.compile(
+    r"""
+    (?=[eE'"\-/$:%;])
+    (?:
+    (?P<estring>(?<![A-Za-z0-9_$])[eE]'(?:[^'\\]|\\.|'')*')
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<ident>"(?:[^"]|"")*")
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*)
+    | (?P<dollar>(?<![A-Za-z0-9_$])\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$)
+    | (?P<cast>::)
+    | (?P<param>:[a-z0-9_]+)
+    | (?P<pyparam>%\((?P<pyname>[^)]+)\)s)
+    | (?P<semicolon>;)
+    )
+    """,
+    re.X | re.S,
+)
+
+LITERALS = re.compile(
+    r"""
+    (?P<estring>(?<![A-Za-z0-9_$])[eE]'(?:[^'\\]|\\.|'')*')
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<ident>"(?:[^"]|"")*")
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*)
+    | (?P<dollar>(?<![A-Za-z0-9_$])\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$)
+    | (?P<cast>::)
+    | (?P<param>:[a-z0-9_]+|%\([^)]+\)s|\$[0-9]+)
+    | (?P<number>(?<![A-Za-z0-9_$])(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)
+    | (?P<space>\s+)
+    """,
+    re.X | re.S,
+)
+
+PYFORMAT = re.compile(r"%(?:\((?P<name>[^)]+)\)s|(?P<percent>%)|.|$)", re.S)
+
+PREPARABLE = re.compile(
+    r"[\s(]*(select|insert|update|delete|values|with|table|merge)\b", re.I
+)
+
+
+def block_comment_end(q, start):
+    depth = 0
+    i = start
+
+    while True:
+        opening = q.find("/*", i)
+        closing = q.find("*/", i)
+
+        if closing == -1:
+            return len(q)
+
+        if opening != -1 and opening < closing:
+            depth += 1
+            i = opening + 2
+        else:
+            depth -= 1
+            i = closing + 2
+
+            if not depth:
+                return i
+
+
+class CompiledQuery:
+    """A query with its `:name` bind parameters rewritten to psycopg2's
+    `%(name)s` style, along with the names of all the parameters it uses.
+
+    `prepared` holds the query rewritten with positional `$1`-style parameters
+    (suitable for a server-side `PREPARE`) and the parameter names in
+    positional order, or None if the query can't be prepared.
+    """
+
+    __slots__ = ("source", "text", "param_names", "prepared")
 
+    def __init__(self, source, text, param_names, prepared=None):
+        self.source = source
+        self.text = text
+        self.param_names = param_names
+        self.prepared = prepared
+
+    def missing(self, params):
+        return [_ for _ in self.param_names if _ not in params]
+
+    def check_params(self, params):
+        missing = self.missing(params)
+
+        if missing:
+            raise ValueError(f"missing query parameters: {', '.join(missing)}")
+
+    def __repr__(self):
+        return f"CompiledQuery({self.source!r})"
+
+
+def positional_form(text, occurrences):
     parts = []
+    names = {}
 
     remainder = 0
+    found = 0
 
-    for m in x.finditer(q):
-        a, b = m.start(1), m.end(1)
+    for m in PYFORMAT.finditer(text):
+        name = m.group("name")
 
-        parts.append(q[remainder:a])
+        if name is not None:
+            replacement = f"${names.setdefault(name, len(names) + 1)}"
+            found += 1
+        elif m.group("percent"):
+            replacement = "%"
+        else:
+            return None
+
+        parts.append(text[remainder : m.start()])
+        parts.append(replacement)
+        remainder = m.end()
+
+    # psycopg2 substitutes parameters even within string literals, which a
+    # prepared statement can't reproduce
+    if found != occurrences:
+        return None
+
+    parts.append(text[remainder:])
+    return "".join(parts), tuple(names)
+
+
+@lru_cache(maxsize=COMPILED_QUERY_CACHE_SIZE)
+def compile_query(q):
+    parts = []
+    names = {}
+
+    remainder = 0
+    pos = 0
+
+    occurrences = 0
+    single_statement = True
+
+    while True:
+        m = TOKENS.search(q, pos)
+
+        if not m:
+            break
 
-        if rewrite:
+        kind = m.lastgroup
+        a, b = m.span()
+        pos = b
+
+        if kind == "param":
             varname = q[a + 1 : b]
+
+            parts.append(q[remainder:a])
             parts.append(f"%({varname})s")
+            names[varname] = None
+
+            remainder = b
+            occurrences += 1
+
+        elif kind == "pyparam":
+            names[m.group("pyname")] = None
+            occurrences += 1
+
+        elif kind == "semicolon":
+            if q[b:].strip():
+                single_statement = False
+
+        elif kind == "block_comment":
+            pos = block_comment_end(q, a)
+
+        elif kind == "dollar":
+            closing = q.find(m.group(), pos)
+            pos = len(q) if closing == -1 else closing + len(m.group())
+
+    parts.append(q[remainder:])
+    text = "".join(parts)
+
+    if single_statement and PREPARABLE.match(q):
+        prepared = positional_form(text, occurrences)
+    else:
+        prepared = None
+
+    return CompiledQuery(q, text, tuple(names), prepared)
+
+
+@lru_cache(maxsize=COMPILED_QUERY_CACHE_SIZE)
+def normalize_query(q):
+    """`q` with literals and parameters replaced by `?`, comments removed,
+    and whitespace collapsed, so that queries differing only in their values
+    normalize the same way."""
+
+    parts = []
+    remainder = 0
+    pos = 0
+
+    while True:
+        m = LITERALS.search(q, pos)
+
+        if not m:
+            break
+
+        kind = m.lastgroup
+        a, b = m.span()
+        pos = b
+
+        if kind in ("ident", "cast"):
+            continue
+
+        if kind == "block_comment":
+            pos = block_comment_end(q, a)
+        elif kind == "dollar":
+            closing = q.find(m.group(), pos)
+            pos = len(q) if closing == -1 else closing + len(m.group())
+
+        if kind in ("line_comment", "block_comment", "space"):
+            replacement = " "
         else:
-            parts.append(q[a:b])
+            replacement = "?"
 
-        remainder = b
+        parts.append(q[remainder:a])
+        parts.append(replacement)
+        remainder = pos
 
     parts.append(q[remainder:])
-    return "".join(parts)
+    return " ".join("".join(parts).split())
+
+
+def reformat_bind_params(q, rewrite=True):
+    if not rewrite:
+        return q
+    return compile_query(q).text
 
 
 def quoted_identifier(
@@ -0,0 +1,228 @@
+import json
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from .psyco import normalize_query
+
+# upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    float("inf"),
+)
+
+STATS_FORMAT_VERSION = 1
+
+SORT_KEYS = ("total_time", "calls", "mean_time", "p99", "rows")
+
+
+class Histogram:
+    """Counts of values in fixed buckets, from which quantiles can be
+    estimated (by interpolating within the bucket the quantile falls in)."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts=None):
+        self.counts = list(counts or [0] * len(LATENCY_BUCKETS))
+        self.total = sum(self.counts)
+
+    def add(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += 1
+
+    def quantile(self, q, minimum=None, maximum=None):
+        if not self.total:
+            return None
+
+        rank = q * self.total
+        seen = 0
+
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                upper = LATENCY_BUCKETS[i]
+
+                if upper == float("inf"):
+                    return maximum if maximum is not None else lower
+
+                estimate = lower + (upper - lower) * (rank - seen) / count
+
+                if maximum is not None:
+                    estimate = min(estimate, maximum)
+                if minimum is not None:
+                    estimate = max(estimate, minimum)
+                return estimate
+
+            seen += count
+
+
+class QueryStat:
+    """Running totals for every call of one normalized query."""
+
+    __slots__ = (
+        "query",
+        "calls",
+        "errors",
+        "rows",
+        "total_time",
+        "min_time",
+        "max_time",
+        "histogram",
+    )
+
+    def __init__(self, query):
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.min_time = None
+        self.max_time = None
+        self.histogram = Histogram()
+
+    def add(self, wall_time, rows=None, error=False):
+        self.calls += 1
+        self.total_time += wall_time
+        self.histogram.add(wall_time)
+
+        if self.min_time is None or wall_time < self.min_time:
+            self.min_time = wall_time
+
+        if self.max_time is None or wall_time > self.max_time:
+            self.max_time = wall_time
+
+        if rows:
+            self.rows += rows
+
+        if error:
+            self.errors += 1
+
+    def as_dict(self, fingerprint=None):
+        h = self.histogram
+        bounds = self.min_time, self.max_time
+
+        return dict(
+            fingerprint=fingerprint,
+            query=self.query,
+            calls=self.calls,
+            errors=self.errors,
+            rows=self.rows,
+            total_time=self.total_time,
+            mean_time=self.total_time / (self.calls or 1),
+            min_time=self.min_time,
+            max_time=self.max_time,
+            p50=h.quantile(0.5, *bounds),
+            p95=h.quantile(0.95, *bounds),
+            p99=h.quantile(0.99, *bounds),
+            histogram=list(h.counts),
+        )
+
+
+def sorted_stats(stats, sort_by="total_time", limit=None):
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"can't sort by {sort_by}, choose from: {SORT_KEYS}")
+
+    stats = sorted(stats, key=lambda _: _[sort_by] or 0, reverse=True)
+    return stats[:limit] if limit else stats
+
+
+class QueryStatsRegistry:
+    """A client-side `pg_stat_statements`: per normalized query call counts,
+    timings (with latency percentiles from a fixed-bucket histogram) and rows
+    returned, for the queries of a `Database`.
+
+    Thread-safe, and bounded to `max_queries` distinct queries: when full,
+    the least called tenth of the entries are dropped to make room.
+    """
+
+    def __init__(self, max_queries=1000):
+        self.max_queries = max_queries
+
+        self._lock = Lock()
+        self._stats = {}
+        self.dropped = 0
+        self.since = time.time()
+
+    def record(self, event):
+        """Record a `QueryEvent` (this is a `QueryHooks` after hook)."""
+
+        key = event.fingerprint
+
+        with self._lock:
+            stat = self._stats.get(key)
+
+            if stat is None:
+                if len(self._stats) >= self.max_queries:
+                    self._drop_least_called()
+
+                stat = self._stats[key] = QueryStat(normalize_query(event.query))
+
+            stat.add(event.wall_time, event.rows, event.error is not None)
+
+    def _drop_least_called(self):
+        # caller must hold self._lock
+        drop = max(1, self.max_queries // 10)
+        by_calls = sorted(self._stats, key=lambda k: self._stats[k].calls)
+
+        for key in by_calls[:drop]:
+            del self._stats[key]
+            self.dropped += 1
+
+    def stats(self, sort_by="total_time", limit=None):
+        with self._lock:
+            stats = [s.as_dict(k) for k, s in self._stats.items()]
+
+        return sorted_stats(stats, sort_by, limit)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.dropped = 0
+            self.since = time.time()
+
+    def as_dump(self):
+        return dict(
+            version=STATS_FORMAT_VERSION,
+            since=self.since,
+            dumped=time.time(),
+            buckets=list(LATENCY_BUCKETS[:-1]),
+            dropped=self.dropped,
+            queries=self.stats(),
+        )
+
+    def dump(self, path):
+        """Write the statistics to `path` as JSON, for `databaseci stats`."""
+
+        with open(path, "w") as f:
+            json.dump(self.as_dump(), f, indent=2)
+
+
+def load_stats(path):
+    """The query statistics in a file written by `QueryStatsRegistry.dump`."""
+
+    with open(path) as f:
+        dumped = json.load(f)
+
+    version = dumped.get("version")
+
+    if version != STATS_FORMAT_VERSION:
+        raise ValueError(f"unsupported query stats format version: {version}")
+
+    return dumped["queries"]
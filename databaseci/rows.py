@@ -1,6 +1,10 @@
-from .curs import DictRow
+from .curs import result_shape, row_class
 from .formatting import format_table_of_dicts
-from .typeguess import guess_sql_type_of_values
+
+
+def column_info_from_description(description):
+    # a copy, since the shape's own dict is shared by every result like it
+    return dict(result_shape(description).column_info)
 
 
 class Rows(list):
@@ -31,6 +35,9 @@ class Rows(list):
 
     @property
     def guessed_sql_columns(self):
+        # typeguess (and pendulum) take a while to import, and are rarely used
+        from .typeguess import guess_sql_type_of_values
+
         return {k: guess_sql_type_of_values(self[k]) for k in self.column_info}
 
     @property
@@ -40,8 +47,65 @@ class Rows(list):
 
         index = {k: i for i, k in enumerate(column_names)}
 
-        rows = Rows(DictRow(index=index, items=list(d.values())) for d in list_of_dicts)
+        cls = row_class(tuple(index.items()))
+
+        rows = Rows(cls(items=list(d.values())) for d in list_of_dicts)
 
         rows.column_info = {k: "text" for k in column_names}
 
         return rows
+
+
+class StreamedRows:
+    """Lazily iterates over the results of a server-side (named) cursor.
+
+    Rows are fetched from the server `cursor.itersize` at a time, so memory use
+    stays bounded regardless of the size of the result. Can only be iterated
+    once, and only while the enclosing transaction is open.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.paging = None
+        self._column_info = None
+        self._peeked = []
+        self._it = iter(cursor)
+
+    @property
+    def column_info(self):
+        if self._column_info is None:
+            if self.cursor.description is None and not self.cursor.closed:
+                # named cursors only know their columns after the first fetch
+                first = next(self._it, None)
+
+                if first is not None:
+                    self._peeked.append(first)
+
+            if self.cursor.description is not None:
+                self._column_info = column_info_from_description(
+                    self.cursor.description
+                )
+        return self._column_info
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._peeked:
+            return self._peeked.pop()
+
+        try:
+            return next(self._it)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.cursor.closed:
+            self.cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -4,8 +4,6 @@ import time
 from contextlib import contextmanager
 from string import ascii_lowercase
 
-import sqlalchemy
-from pendulum import now
 from psycopg2 import OperationalError
 
 import databaseci
@@ -20,7 +18,7 @@ def get_docker_client():
 
 
 def try_connect(db_url, timeout=3.0, should_raise=True):
-    start = now()
+    start = time.monotonic()
 
     while True:
         try:
@@ -30,10 +28,9 @@ def try_connect(db_url, timeout=3.0, should_raise=True):
         except OperationalError:
             pass
 
-        current = now()
-        elapsed = current - start
+        elapsed = time.monotonic() - start
 
-        if elapsed.total_seconds() > timeout:
+        if elapsed > timeout:
             if should_raise:
                 raise RuntimeError("cannot connect")
             return False
@@ -42,7 +39,7 @@ def try_connect(db_url, timeout=3.0, should_raise=True):
 def wait_open(port, host="localhost", timeout=3.0, should_raise=True):
     PAUSE = 0.1
 
-    start = now()
+    start = time.monotonic()
 
     while True:
 
@@ -53,7 +50,7 @@ def wait_open(port, host="localhost", timeout=3.0, should_raise=True):
         except socket.error:
             pass
 
-        elapsed = (now() - start).total_seconds()
+        elapsed = time.monotonic() - start
 
         if elapsed > timeout:
             if should_raise:
@@ -1,5 +1,4 @@
 import pendulum
-import six
 from pendulum.date import Date as date_type
 from pendulum.datetime import DateTime as datetime_type
 
@@ -35,8 +34,8 @@ def guess_value_type(x):
 def guess_type_of_values(values):
     present = {guess_value_type(x) for x in values if x is not None}
 
-    if six.text_type in present:
-        return six.text_type
+    if str in present:
+        return str
     if datetime_type in present:
         return datetime_type
     if date_type in present:
@@ -45,7 +44,7 @@ def guess_type_of_values(values):
         return float
     if int in present:
         return int
-    return six.text_type
+    return str
 
 
 def guess_sql_type_of_values(values):
@@ -3,8 +3,6 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Union
 
-import yaml
-
 
 def normalized_path(path_or_str: Union[Path, str]):
     p = Path(path_or_str)
@@ -12,6 +10,8 @@ def normalized_path(path_or_str: Union[Path, str]):
 
 
 def yaml_from_file(path):
+    import yaml
+
     p = normalized_path(path)
 
     with p.open() as stream:
@@ -0,0 +1,115 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from databaseci.copying import (
+    CopyReader,
+    array_literal,
+    copy_field,
+    copy_line,
+    copy_value,
+)
+
+
+@pytest.mark.parametrize(
+    "value, text",
+    [
+        ("plain", "plain"),
+        ("a\tb", "a\\tb"),
+        ("a\nb", "a\\nb"),
+        ("a\r\nb", "a\\r\\nb"),
+        ("a\\b", "a\\\\b"),
+        ("\\N", "\\\\N"),
+        ("", ""),
+        (None, "\\N"),
+        (True, "t"),
+        (False, "f"),
+        (0, "0"),
+        (1.5, "1.5"),
+        (Decimal("1.10"), "1.10"),
+        (
+            UUID("12345678-1234-5678-1234-567812345678"),
+            "12345678-1234-5678-1234-567812345678",
+        ),
+        (date(2022, 1, 2), "2022-01-02"),
+        (datetime(2022, 1, 2, 3, 4, 5), "2022-01-02T03:04:05"),
+        (time(3, 4, 5), "03:04:05"),
+        (timedelta(minutes=1, seconds=30), "90.0 seconds"),
+        (b"\x01\xff", "\\\\x01ff"),
+        (bytearray(b"ab"), "\\\\x6162"),
+        (memoryview(b""), "\\\\x"),
+        ({"a": "b\tc"}, '{"a": "b\\\\tc"}'),
+    ],
+)
+def test_copy_field(value, text):
+    assert copy_field(value) == text
+
+
+@pytest.mark.parametrize(
+    "values, literal",
+    [
+        ([], "{}"),
+        ([1, 2], '{"1","2"}'),
+        ([None, "a"], '{NULL,"a"}'),
+        (["NULL"], '{"NULL"}'),
+        (['a"b', "c\\d", "e,f"], '{"a\\"b","c\\\\d","e,f"}'),
+        ([[1, 2], [3, None]], '{{"1","2"},{"3",NULL}}'),
+        ([["a", ["b"]]], '{{"a",{"b"}}}'),
+        ((True, False), '{"t","f"}'),
+    ],
+)
+def test_array_literal(values, literal):
+    assert array_literal(values) == literal
+
+
+def test_array_copy_field():
+    # array quoting happens first, then the copy escaping of the whole field
+    assert copy_value(["a\tb", 'c"d']) == '{"a\tb","c\\"d"}'
+    assert copy_field(["a\tb", 'c"d']) == '{"a\\tb","c\\\\"d"}'
+
+
+def test_copy_line():
+    row = dict(b="x\ty", a=None, c=1)
+
+    assert copy_line(row, ["a", "b", "c"]) == "\\N\tx\\ty\t1\n"
+
+
+ROWS = [dict(id=i, name=f"n{i}") for i in range(5)]
+
+
+def test_read_all():
+    reader = CopyReader(ROWS, ["id", "name"])
+
+    assert reader.read() == "".join(f"{i}\tn{i}\n" for i in range(5))
+    assert reader.read() == ""
+    assert reader.count == 5
+
+
+def test_read_chunks():
+    # each line is 5 characters, and reads stop at the first line that
+    # reaches the requested size
+    reader = CopyReader(ROWS, ["id", "name"])
+
+    assert reader.read(1) == "0\tn0\n"
+    assert reader.read(6) == "1\tn1\n2\tn2\n"
+    assert reader.read(10) == "3\tn3\n4\tn4\n"
+    assert reader.read(10) == ""
+    assert reader.count == 5
+
+
+def test_readline():
+    reader = CopyReader(ROWS[:2], ["name"])
+
+    assert reader.readline() == "n0\n"
+    assert reader.readline() == "n1\n"
+    assert reader.readline() == ""
+
+
+def test_progress():
+    counts = []
+    reader = CopyReader(ROWS, ["id"], progress=counts.append, progress_every=2)
+    reader.read()
+
+    assert counts == [2, 4]
@@ -0,0 +1,114 @@
+import pickle
+
+import pytest
+
+from databaseci.curs import DictRow, row_class
+from databaseci.loading import rows_from_text
+
+
+def make_row(**values):
+    index = {name: i for i, name in enumerate(values)}
+    return DictRow(index=index, items=list(values.values()))
+
+
+def test_access():
+    row = make_row(id=1, name="a")
+
+    assert row["id"] == 1
+    assert row[1] == "a"
+    assert row[-1] == "a"
+    assert row[:] == (1, "a")
+    assert row.name == "a"
+    assert row.get("name") == "a"
+    assert row.get("missing", 2) == 2
+    assert "id" in row
+    assert "missing" not in row
+    assert list(row.keys()) == ["id", "name"]
+    assert list(row.values()) == [1, "a"]
+    assert list(row.items()) == [("id", 1), ("name", "a")]
+    assert dict(row) == dict(id=1, name="a")
+
+    with pytest.raises(KeyError):
+        row["missing"]
+
+    with pytest.raises(AttributeError):
+        row.missing
+
+
+def test_class_per_columns():
+    a = make_row(id=1, name="a")
+    b = make_row(id=2, name="b")
+
+    assert type(a) is type(b)
+    assert type(a) is row_class((("id", 0), ("name", 1)))
+    assert type(a) is not type(make_row(name="a", id=1))
+    assert isinstance(a, DictRow)
+    assert isinstance(a, tuple)
+
+
+def test_columns_take_precedence_over_methods():
+    row = make_row(count=3, items="x", keys=None)
+
+    assert row.count == 3
+    assert row.items == "x"
+    assert row.keys is None
+    assert row["count"] == 3
+
+
+def test_unusable_attribute_names():
+    row = make_row(**{"two words": 1, "_private": 2})
+
+    assert row["two words"] == 1
+    assert row["_private"] == 2
+
+    with pytest.raises(AttributeError):
+        row._private
+
+
+def test_padding():
+    row = DictRow(index=dict(a=0, b=1, c=2), items=[1])
+
+    assert tuple(row) == (1, None, None)
+    assert row.c is None
+    assert tuple(DictRow(index=dict(a=0))) == (None,)
+
+
+def test_equality():
+    row = make_row(id=1, name="a")
+
+    assert row == dict(id=1, name="a")
+    assert row != dict(id=1, name="b")
+    assert row != dict(id=1)
+    assert row == make_row(id=1, name="a")
+    assert row != make_row(id=1, title="a")
+    assert row == (1, "a")
+    assert row != (1, "b")
+    assert row != [1, "a"]
+
+
+def test_unhashable():
+    with pytest.raises(TypeError):
+        hash(make_row(id=1))
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle(protocol):
+    row = make_row(id=1, name="a", count=None)
+    unpickled = pickle.loads(pickle.dumps(row, protocol))
+
+    assert unpickled == row
+    assert type(unpickled) is type(row)
+    assert unpickled.name == "a"
+    assert unpickled.count is None
+
+
+def test_rows_from_text():
+    rows = rows_from_text("id,name\n1,a\n2,b\n")
+
+    assert rows["name"] == ["a", "b"]
+    assert rows[0].id == "1"
+    assert rows.as_dicts() == [dict(id="1", name="a"), dict(id="2", name="b")]
+    assert rows.column_info == dict(id="text", name="text")
+
+    with pytest.raises(ValueError):
+        rows["missing"]
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+# only loaded on first use of the feature that needs them
+LAZY_DEPENDENCIES = ("sqlalchemy", "pendulum", "six", "yaml", "click", "asyncio")
+
+
+def imported_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            yield line.split("|")[-1].strip().split(".")[0]
+
+
+@pytest.mark.parametrize("code", ["import databaseci", "import databaseci.psyco"])
+def test_no_eager_dependencies(code):
+    eager = set(imported_modules(code)) & set(LAZY_DEPENDENCIES)
+
+    assert not eager, f"{code} loaded: {', '.join(sorted(eager))}"
+
+
+def test_lazy_dependencies_detected():
+    # make sure the check above would notice them being imported
+    assert "asyncio" in set(imported_modules("import asyncio"))
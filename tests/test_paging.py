@@ -0,0 +1,73 @@
+import pytest
+
+from databaseci.paging import get_paged_query, inlinable_parts
+
+
+@pytest.mark.parametrize(
+    "query, parts",
+    [
+        ("select * from t", ("select * from t", None)),
+        ("select id from t;", ("select id from t", None)),
+        ("select distinct id from t", ("select distinct id from t", None)),
+        ('select t."ID" from t', ('select t."ID" from t', None)),
+        ("select id from t x where id > 1", ("select id from t x ", "id > 1")),
+        (
+            "select id from t where name = 'order'",
+            ("select id from t ", "name = 'order'"),
+        ),
+    ],
+)
+def test_inlinable(query, parts):
+    assert inlinable_parts(query, "id") == parts
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "select t.id from t join u on u.id = t.id",
+        "select id from t, lateral (select 1) x",
+        "select id from (select id from t) s",
+        "select id from t where id in (select id from u)",
+        "with x as (select id from t) select id from x",
+        "select lower(name) as id from t",
+        "select name as id from t",
+        "select name from t",
+        "select distinct on (id) id from t",
+        "select id from t group by id",
+        "select id from t order by id",
+        "select id from t limit 5",
+        "select id from t union select id from u",
+        "select id from t -- comment",
+        "select id from t where name = $$x$$",
+        "select id from t for update",
+    ],
+)
+def test_not_inlinable(query):
+    assert inlinable_parts(query, "id") is None
+
+
+def test_inline_parenthesizes_where():
+    query, params = get_paged_query(
+        "select id from t where a = 1 or b = 2",
+        {},
+        "id",
+        bookmark=(5,),
+        mode="inline",
+    )
+
+    assert "unpaged_table" not in query
+    assert "where (\na = 1 or b = 2\n) and id > %(paging_id)s" in query
+    assert params == {"paging_id": 5}
+
+
+def test_inline_falls_back_to_wrap():
+    query, _ = get_paged_query(
+        "select t.id from t join u on u.id = t.id", {}, "id", mode="inline"
+    )
+
+    assert "unpaged_table" in query
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        get_paged_query("select id from t", {}, "id", mode="nested")
@@ -0,0 +1,92 @@
+import pytest
+
+from databaseci.psyco import compile_query, normalize_query
+
+
+def test_param_at_start():
+    c = compile_query(":a")
+
+    assert c.text == "%(a)s"
+    assert c.param_names == ("a",)
+
+
+def test_params_rewritten():
+    c = compile_query("select :a, :b, :a")
+
+    assert c.text == "select %(a)s, %(b)s, %(a)s"
+    assert c.param_names == ("a", "b")
+    assert c.prepared == ("select $1, $2, $1", ("a", "b"))
+
+
+@pytest.mark.parametrize(
+    "q",
+    [
+        "select ':x', :c",
+        "select 'it''s :x', :c",
+        "select e'\\' :x', :c",
+        'select 1 as ":x", :c',
+        "select $$ :x $$, :c",
+        "select $tag$ :x $ :y $tag$, :c",
+        "select 1 -- :x\n, :c",
+        "select /* :x */ :c",
+        "select /* /* :x */ :y */ :c",
+    ],
+)
+def test_params_skipped_in_literals_and_comments(q):
+    c = compile_query(q)
+
+    assert c.param_names == ("c",)
+    assert c.text == q.replace(":c", "%(c)s")
+
+
+def test_casts():
+    c = compile_query("select :a::int, x::text from t")
+
+    assert c.text == "select %(a)s::int, x::text from t"
+    assert c.param_names == ("a",)
+
+
+def test_pyformat_params():
+    c = compile_query("select %(a)s, :b")
+
+    assert c.text == "select %(a)s, %(b)s"
+    assert c.prepared == ("select $1, $2", ("a", "b"))
+
+
+def test_percent_literal():
+    c = compile_query("select '%%', :a")
+
+    assert c.prepared == ("select '%', $1", ("a",))
+
+
+@pytest.mark.parametrize(
+    "q",
+    [
+        "select 1; select 2",
+        "create table t (x int)",
+        "select '%(a)s', :a",
+    ],
+)
+def test_not_preparable(q):
+    assert compile_query(q).prepared is None
+
+
+def test_trailing_semicolon_preparable():
+    assert compile_query("select :a;").prepared is not None
+
+
+@pytest.mark.parametrize(
+    "q, normalized",
+    [
+        ("select 1, 'a', 1.5e3, .5", "select ?, ?, ?, ?"),
+        ("select  :a,\n %(b)s, $1", "select ?, ?, ?"),
+        ("select x::int from t", "select x::int from t"),
+        ('select "a1", a2 from t', 'select "a1", a2 from t'),
+        ("select e'it\\'s', 'it''s'", "select ?, ?"),
+        ("select $$ 1 $$, $t$ 'a' $t$", "select ?, ?"),
+        ("select 1 -- one\nfrom t", "select ? from t"),
+        ("select /* a /* b */ c */ 1", "select ?"),
+    ],
+)
+def test_normalize_query(q, normalized):
+    assert normalize_query(q) == normalized